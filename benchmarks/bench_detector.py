@@ -0,0 +1,235 @@
+# File: benchmarks/bench_detector.py
+"""
+Micro-benchmarks for Detector.detect_frame and the FaceIndex gallery search.
+
+Scenarios (names are stable so runs can be compared):
+    no_person                         synthetic empty scene, the NO_PERSON early exit
+    yolo_only                         preprocess + YOLO forward pass on the person image
+    detect_frame/faces=N/annotate=on  full pipeline on N tiled copies of the person image
+    detect_frame/faces=N/annotate=off
+    face_search/gallery=G             FaceIndex.search of the person's face encoding in a
+                                      G-identity gallery (SEARCH_REPEATS searches per sample)
+
+The person image defaults to a fixed fixture: one person with a frontal face, cropped from
+the zidane.jpg sample that ships with ultralytics, so every run sees identical input.
+--image replaces it with a recorded frame (e.g. an evidence snapshot); such runs are not
+comparable with the committed baseline. Results are written as JSON; with --baseline, any
+scenario whose p50 grew by more than --threshold, or that has no baseline entry, fails the run.
+
+Usage:
+    python benchmarks/bench_detector.py --save-baseline benchmarks/detector_baseline.json
+    python benchmarks/bench_detector.py --baseline benchmarks/detector_baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Keep the benchmark's face gallery out of the real hub database.
+os.environ.setdefault(
+    "HUB_DB_NAME", os.path.join(tempfile.mkdtemp(prefix="detector_bench_"), "bench.db")
+)
+
+from db import Database
+from face_index import EMBEDDING_DIM, FaceIndex
+from fixtures import fixture_person, synthetic_scene
+from yolo_model import Detector
+
+# Searches timed per face_search sample: a single search takes microseconds, well below
+# the timer and scheduler jitter, so one sample covers a batch of them.
+SEARCH_REPEATS = 200
+
+
+def tile(image: np.ndarray, copies: int) -> np.ndarray:
+    """
+    Places `copies` copies of the image side by side on a 16:9 canvas, giving a camera-
+    shaped frame with that many people.
+    """
+    h, w = image.shape[:2]
+    # As few rows as possible while the grid stays no wider than 16:9.
+    rows = 1
+    while math.ceil(copies / rows) * w * 9 > rows * h * 16:
+        rows += 1
+    cols = math.ceil(copies / rows)
+    height = max(rows * h, math.ceil(cols * w * 9 / 16))
+    canvas = np.zeros((height, height * 16 // 9, 3), dtype=np.uint8)
+    for i in range(copies):
+        r, c = divmod(i, cols)
+        canvas[r * h : (r + 1) * h, c * w : (c + 1) * w] = image
+    return canvas
+
+
+def synthetic_gallery(size: int, rng, anchor=None):
+    """Random identities; `anchor` (the recorded face's encoding) is enrolled as one of them."""
+    encodings = rng.normal(0.0, 0.09, size=(size, EMBEDDING_DIM)).astype(np.float32)
+    names = [f"person_{i}" for i in range(size)]
+    if anchor is not None:
+        encodings[size // 2] = anchor
+        names[size // 2] = "enrolled"
+    return names, encodings
+
+
+def time_call(fn, runs: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "mean_ms": round(float(np.mean(samples)), 3),
+    }
+
+
+def run_scenarios(detector: Detector, image, args) -> dict:
+    results = {}
+    recogniser = detector.face_recogniser
+
+    def record(name: str, fn, **extra):
+        stats = time_call(fn, args.runs, args.warmup)
+        stats.update(extra)
+        results[name] = stats
+        print(f"{name:<40} | {stats['p50_ms']:>9.2f} | {stats['p95_ms']:>9.2f}")
+
+    print(f"{'scenario':<40} | {'p50 ms':>9} | {'p95 ms':>9}")
+
+    empty = synthetic_scene()
+    _, _, outcome = detector.detect_frame(empty)
+    if outcome != "NO_PERSON":
+        print("Warning: YOLO found a person in the synthetic scene; no_person is not an early exit.")
+    record("no_person", lambda: detector.detect_frame(empty))
+
+    record(
+        "yolo_only",
+        lambda: detector.predict_batch([detector.preprocess(image)]),
+    )
+
+    # Face gallery scenarios match against an index that contains the recorded face.
+    # The encoding is computed once here; face_search times only the gallery search.
+    rng = np.random.default_rng(11)
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    encodings = face_recognition.face_encodings(rgb)
+    anchor = encodings[0] if encodings else None
+    if anchor is None:
+        sys.exit("No face found in the person image; the face scenarios would measure nothing.")
+
+    # Pipeline scenarios use a small fixed gallery so only N and annotation vary.
+    recogniser.index = FaceIndex(*synthetic_gallery(args.pipeline_gallery, rng, anchor))
+    for copies in args.faces:
+        frame = tile(image, copies)
+        _, _, found = detector.detect_frame(frame)
+        found = 0 if found == "NO_PERSON" else len(found)
+        for annotate in (True, False):
+            name = f"detect_frame/faces={copies}/annotate={'on' if annotate else 'off'}"
+            # camera_id=None: recognise every face on every call, no tracker reuse.
+            record(name, lambda: detector.detect_frame(frame, annotate=annotate), faces_found=found)
+
+    queries = np.array([anchor])
+    for size in args.gallery_sizes:
+        index = FaceIndex(*synthetic_gallery(size, rng, anchor))
+
+        def search():
+            for _ in range(SEARCH_REPEATS):
+                index.search(queries, k=recogniser.top_k)
+
+        record(f"face_search/gallery={size}", search)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Returns (scenario, baseline_p50, current_p50) for every regression beyond the threshold.
+    A scenario missing from the baseline is reported with baseline_p50 None.
+    """
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            regressions.append((name, None, stats["p50_ms"]))
+        elif stats["p50_ms"] > reference["p50_ms"] * (1.0 + threshold):
+            regressions.append((name, reference["p50_ms"], stats["p50_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--image", help="Recorded frame with one person and a visible face (default: fixture)."
+    )
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--runs", type=int, default=60)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--gallery-sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--pipeline-gallery", type=int, default=100)
+    parser.add_argument("--out", default="detector_bench.json", help="Where to write this run.")
+    parser.add_argument("--baseline", help="Previous results to compare against.")
+    parser.add_argument("--save-baseline", help="Also store this run as the new baseline.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="Allowed p50 slowdown (0.15 = 15%%)."
+    )
+    args = parser.parse_args()
+
+    if args.image:
+        image = cv2.imread(args.image)
+        if image is None:
+            sys.exit(f"Could not read {args.image}.")
+    else:
+        image = fixture_person()
+
+    Database().init_db()
+    detector = Detector(backend=args.backend, threads=args.threads)
+    results = run_scenarios(detector, image, args)
+
+    report = {
+        "meta": {
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "threads": args.threads,
+            "image": os.path.basename(args.image) if args.image else "fixture:zidane.jpg",
+            "runs": args.runs,
+        },
+        "results": results,
+    }
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if not args.baseline:
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("machine") != report["meta"]["machine"]:
+        print("Warning: baseline was recorded on a different machine type.")
+    if baseline.get("meta", {}).get("image") != report["meta"]["image"]:
+        print("Warning: baseline was recorded on a different person image.")
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, before, after in regressions:
+        if before is None:
+            print(f"MISSING {name}: no baseline entry (p50 {after:.2f} ms); re-record the baseline.")
+        else:
+            print(f"REGRESSION {name}: p50 {before:.2f} ms -> {after:.2f} ms")
+    print(f"\nThreshold +{args.threshold:.0%} p50: {'FAIL' if regressions else 'PASS'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
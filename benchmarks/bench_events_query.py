@@ -0,0 +1,141 @@
+# File: benchmarks/bench_events_query.py
+"""
+Latency benchmark for the keyset-paginated events query (Database.get_events).
+
+Seeds a synthetic snapshots table, then times first pages, deep pages and filtered
+pages. Exits with status 1 if any p95 exceeds the target.
+
+Usage:
+    python benchmarks/bench_events_query.py --rows 1000000 --target-ms 10
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db import Database
+
+
+def seed(db: Database, rows: int, cameras: int, labs: int, batch: int = 50000):
+    """Inserts `rows` synthetic detections spread one second apart, oldest first."""
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    with db.writer() as conn:
+        for offset in range(0, rows, batch):
+            chunk = []
+            for i in range(offset, min(offset + batch, rows)):
+                created = start + timedelta(seconds=i)
+                camera = rng.randrange(cameras)
+                chunk.append(
+                    (
+                        f"edge-camera-{camera:02d}",
+                        "sit",
+                        f"lab{camera % labs:02d}",
+                        created.strftime("%Y%m%d_%H%M%S"),
+                        round(rng.uniform(50, 100), 1),
+                        f"incident_{i}.jpg",
+                        created.strftime("%Y-%m-%d %H:%M:%S"),
+                    )
+                )
+            conn.executemany(
+                """
+                INSERT INTO snapshots (camera_id, location, lab_id, detection_timestamp, confidence, filename, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                chunk,
+            )
+    return start, start + timedelta(seconds=rows - 1)
+
+
+def deep_cursor(db: Database, pages: int, **filters) -> str:
+    """Walks `pages` pages back and returns the cursor reached, to time deep pagination."""
+    cursor = None
+    for _ in range(pages):
+        _, cursor = db.get_events(limit=50, cursor=cursor, **filters)
+        if cursor is None:
+            break
+    return cursor
+
+
+def time_query(db: Database, repeats: int, **kwargs) -> dict:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        db.get_events(**kwargs)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cameras", type=int, default=12)
+    parser.add_argument("--labs", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--target-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="events_bench_")
+    # Database resolves names relative to src/, so hand it an absolute path.
+    db = Database(os.path.join(workdir, "bench.db"))
+    db.init_db()
+
+    t0 = time.perf_counter()
+    first, last = seed(db, args.rows, args.cameras, args.labs)
+    print(f"Seeded {args.rows:,} rows in {time.perf_counter() - t0:.1f} s ({db.db_path})")
+
+    middle = first + (last - first) / 2
+    window = {
+        "since": (middle - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"),
+        "until": (middle + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    scenarios = {
+        "first page": {},
+        "page 200": {"cursor": deep_cursor(db, 200)},
+        "camera filter": {"camera_id": "edge-camera-03"},
+        "camera filter, page 100": {
+            "camera_id": "edge-camera-03",
+            "cursor": deep_cursor(db, 100, camera_id="edge-camera-03"),
+        },
+        "lab + 2h window": {"lab_id": "lab01", **window},
+        "location + min confidence": {"location": "sit", "min_confidence": 90.0},
+    }
+
+    failed = False
+    print(f"\n{'scenario':<28} | {'p50 ms':>8} | {'p95 ms':>8}")
+    for name, filters in scenarios.items():
+        stats = time_query(db, args.repeats, limit=50, **filters)
+        over = stats["p95"] > args.target_ms
+        failed |= over
+        flag = "  <-- over target" if over else ""
+        print(f"{name:<28} | {stats['p50']:>8.3f} | {stats['p95']:>8.3f}{flag}")
+
+    # EXPLAIN the exact SQL get_events runs for each scenario.
+    with db.reader() as conn:
+        for name, filters in scenarios.items():
+            sql, params = db.build_events_query(limit=50, **filters)
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            print(f"\nQuery plan ({name}):")
+            for row in plan:
+                print(f"  {row[-1]}")
+
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(f"\nTarget p95 <= {args.target_ms} ms: {'FAIL' if failed else 'PASS'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
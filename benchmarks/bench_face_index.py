@@ -0,0 +1,103 @@
+# File: benchmarks/bench_face_index.py
+"""
+Scaling benchmark for face_index.FaceIndex.
+
+Compares the legacy per-face list matching (compare_faces + face_distance over a Python
+list), the exact vectorised index and the approximate IVF index across gallery sizes.
+
+Usage:
+    python benchmarks/bench_face_index.py --sizes 10 100 1000 10000 50000 --faces 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from face_index import EMBEDDING_DIM, FaceIndex
+
+
+def make_gallery(size: int, rng):
+    """Synthetic unit-scale embeddings roughly matching the spread of dlib encodings."""
+    encodings = rng.normal(0.0, 0.09, size=(size, EMBEDDING_DIM)).astype(np.float32)
+    names = [f"person_{i}" for i in range(size)]
+    return names, encodings
+
+
+def legacy_match(known_encodings: list, known_names: list, queries, tolerance=0.5):
+    """Re-implementation of the old list-based loop in FaceRecogniser.recognise."""
+    names = []
+    for encoding in queries:
+        # compare_faces() and face_distance() each computed the full distance list.
+        matches = list(np.linalg.norm(known_encodings - encoding, axis=1) <= tolerance)
+        if True in matches:
+            idx = matches.index(True)
+            np.linalg.norm(known_encodings - encoding, axis=1)[idx]
+            names.append(known_names[idx])
+        else:
+            names.append("Unknown")
+    return names
+
+
+def time_call(fn, repeats: int) -> float:
+    """Median wall time of `fn` in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 50000]
+    )
+    parser.add_argument("--faces", type=int, default=5, help="Faces per frame.")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(
+        f"{'gallery':>8} | {'legacy ms':>10} | {'exact ms':>9} | {'ivf ms':>8} | "
+        f"{'ivf build s':>11} | {'ivf recall@1':>12}"
+    )
+    for size in args.sizes:
+        names, encodings = make_gallery(size, rng)
+        # Queries are noisy copies of gallery members, as a live camera would produce.
+        truth = rng.choice(size, args.faces)
+        queries = encodings[truth] + rng.normal(0.0, 0.02, (args.faces, EMBEDDING_DIM))
+        queries = queries.astype(np.float32)
+
+        legacy_list = [np.array(e, dtype=np.float64) for e in encodings]
+        legacy_ms = time_call(
+            lambda: legacy_match(np.array(legacy_list), names, queries), args.repeats
+        )
+
+        exact = FaceIndex(names, encodings, ann=False)
+        exact_ms = time_call(lambda: exact.search(queries, k=args.k), args.repeats)
+
+        t0 = time.perf_counter()
+        ivf = FaceIndex(names, encodings, ann=True)
+        build_s = time.perf_counter() - t0
+        ivf_ms = time_call(lambda: ivf.search(queries, k=args.k), args.repeats)
+
+        # Recall: how often the IVF nearest neighbour equals the exact nearest neighbour.
+        exact_top = [r[0][0] for r in exact.search(queries, k=1)]
+        ivf_top = [r[0][0] if r else None for r in ivf.search(queries, k=1)]
+        recall = np.mean([a == b for a, b in zip(exact_top, ivf_top)])
+
+        print(
+            f"{size:>8} | {legacy_ms:>10.3f} | {exact_ms:>9.3f} | {ivf_ms:>8.3f} | "
+            f"{build_s:>11.2f} | {recall:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
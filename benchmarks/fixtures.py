@@ -0,0 +1,40 @@
+# File: benchmarks/fixtures.py
+"""
+Deterministic frames shared by the benchmarks, so every run sees identical input.
+"""
+import sys
+
+import cv2
+import numpy as np
+from ultralytics.utils import ASSETS
+
+# (y1, y2, x1, x2) of the single right-hand person (frontal face) in ultralytics' zidane.jpg.
+FIXTURE_CROP = (0, 720, 730, 1180)
+
+
+def synthetic_scene(width: int = 1280, height: int = 720) -> np.ndarray:
+    """Deterministic textured background with no people in it."""
+    rng = np.random.default_rng(7)
+    noise = rng.integers(0, 255, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    return cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+
+
+def fixture_person() -> np.ndarray:
+    """The default person image: a fixed crop of a sample bundled with ultralytics."""
+    image = cv2.imread(str(ASSETS / "zidane.jpg"))
+    if image is None:
+        sys.exit(f"Fixture image {ASSETS / 'zidane.jpg'} is missing from the ultralytics install.")
+    y1, y2, x1, x2 = FIXTURE_CROP
+    return np.ascontiguousarray(image[y1:y2, x1:x2])
+
+
+def person_scene(width: int = 1280, height: int = 720) -> np.ndarray:
+    """The synthetic scene with the fixture person standing in the middle, full height."""
+    frame = synthetic_scene(width, height)
+    person = fixture_person()
+    scale = min(height / person.shape[0], width / person.shape[1])
+    person = cv2.resize(person, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    h, w = person.shape[:2]
+    x, y = (width - w) // 2, height - h
+    frame[y : y + h, x : x + w] = person
+    return frame
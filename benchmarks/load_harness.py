@@ -0,0 +1,494 @@
+# File: benchmarks/load_harness.py
+"""
+Record-and-replay load harness for the hub ingest pipeline.
+
+`record` captures raw MQTT payloads from sit/+/+/vision/person into a compact log.
+`replay` imports the hub (src/app.py) in-process and drives its on_message pipeline
+with recorded or synthetic frames at a fixed rate per simulated camera, either through
+an in-process fake broker (no mosquitto needed) or a local mosquitto. It reports
+sustained throughput, end-to-end latency percentiles, drops and CPU/RSS, and exits with
+status 1 if a --min-throughput / --max-p95-ms gate fails.
+
+The synthetic frame shows one person (the benchmarks' fixture) by default, so every
+frame goes through face recognition, evidence writing and the DB insert. --scene empty
+sends a frame with nobody in it instead, which only measures the no_person early exit.
+
+Log format: an 8-byte magic, then per message a ">dHI" header (seconds since the start
+of the recording, topic length, payload length) followed by the topic and payload bytes.
+
+Usage:
+    python benchmarks/load_harness.py record --out payloads.log --duration 60
+    python benchmarks/load_harness.py replay --cameras 8 --fps 2 --duration 30
+    python benchmarks/load_harness.py replay --log payloads.log --cameras 4 --transport mosquitto
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import resource
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+import paho.mqtt.client as mqtt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fixtures import person_scene, synthetic_scene
+from frame_envelope import decode_frame, encode_frame, is_binary_frame
+
+LOG_MAGIC = b"SITLOG1\n"
+RECORD_HEADER = struct.Struct(">dHI")
+TOPIC_FILTER = "sit/+/+/vision/person"
+
+
+# -------------------------
+# Payload Log
+# -------------------------
+
+
+def write_log(path: str, messages):
+    """Writes (offset_s, topic, payload) tuples to a payload log."""
+    with open(path, "wb") as f:
+        f.write(LOG_MAGIC)
+        for offset, topic, payload in messages:
+            topic_bytes = topic.encode("utf-8")
+            f.write(RECORD_HEADER.pack(offset, len(topic_bytes), len(payload)))
+            f.write(topic_bytes)
+            f.write(payload)
+
+
+def read_log(path: str) -> list:
+    """Returns every (offset_s, topic, payload) tuple stored in a payload log."""
+    with open(path, "rb") as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} is not a payload log.")
+        messages = []
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            offset, topic_len, payload_len = RECORD_HEADER.unpack(header)
+            topic = f.read(topic_len).decode("utf-8")
+            messages.append((offset, topic, f.read(payload_len)))
+        return messages
+
+
+def record(args):
+    """Subscribes to the vision topic and appends every payload to the log."""
+    lock = threading.Lock()
+    messages = []
+    t0 = time.perf_counter()
+
+    def on_connect(client, userdata, flags, reason_code, properties):
+        client.subscribe(args.topic, qos=1)
+        print(f"Recording {args.topic} from {args.broker}:{args.port}...")
+
+    def on_message(client, userdata, msg):
+        with lock:
+            messages.append((time.perf_counter() - t0, msg.topic, bytes(msg.payload)))
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.username_pw_set(args.user, args.password)
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+    try:
+        while time.perf_counter() - t0 < args.duration:
+            if args.max_messages and len(messages) >= args.max_messages:
+                break
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+    with lock:
+        write_log(args.out, messages)
+    size = sum(len(payload) for _, _, payload in messages)
+    print(f"Recorded {len(messages)} payloads ({size / 1e6:.1f} MB) to {args.out}")
+
+
+# -------------------------
+# In-process Fake Broker
+# -------------------------
+
+
+class FakeBroker:
+    """
+    Minimal in-process MQTT broker: topic-filter subscriptions and delivery of each
+    publish to subscribers on a single network thread, as paho's loop thread would.
+    """
+
+    def __init__(self):
+        self.subscriptions = []  # (topic filter, FakeClient)
+        self.deliveries = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="fake-broker", daemon=True)
+        self.thread.start()
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0):
+        self.deliveries.put((topic, payload, qos))
+
+    def pending(self) -> int:
+        return self.deliveries.qsize()
+
+    def _run(self):
+        while True:
+            topic, payload, qos = self.deliveries.get()
+            message = mqtt.MQTTMessage(topic=topic.encode("utf-8"))
+            message.payload = payload
+            message.qos = qos
+            for topic_filter, client in list(self.subscriptions):
+                if client.on_message and mqtt.topic_matches_sub(topic_filter, topic):
+                    client.on_message(client, None, message)
+
+
+class FakeClient:
+    """The subset of paho.mqtt.client.Client that the hub uses, bound to a FakeBroker."""
+
+    def __init__(self, broker: FakeBroker):
+        self.broker = broker
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def connect(self, host, port=1883, keepalive=60):
+        if self.on_connect:
+            self.on_connect(self, None, None, 0, None)
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        if self.on_disconnect:
+            self.on_disconnect(self, None, None, 0, None)
+
+    def subscribe(self, topic, qos=0):
+        self.broker.subscriptions.append((topic, self))
+
+    def publish(self, topic, payload, qos=0):
+        self.broker.publish(topic, payload, qos)
+
+
+# -------------------------
+# Load Generation
+# -------------------------
+
+
+def synthetic_payloads(width: int, height: int, quality: int, scene: str = "person") -> list:
+    """
+    One deterministic JPEG frame in the binary envelope, as the edge would send it:
+    the fixture person on a textured background, or the background alone ("empty").
+    """
+    frame = person_scene(width, height) if scene == "person" else synthetic_scene(width, height)
+    success, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not success:
+        raise RuntimeError("Failed to encode the synthetic frame.")
+    metadata = {"camera_id": "synthetic", "location": "sit", "lab_id": "lab00", "confidence": 75.0}
+    return [encode_frame(metadata, buffer)]
+
+
+def retarget(payload: bytes, camera_id: str, lab_id: str, seq: int) -> bytes:
+    """
+    Rewrites a payload for one simulated camera. The sequence number makes every payload
+    unique, so the hub's duplicate filter does not discard replayed frames.
+    """
+    stamp = {"camera_id": camera_id, "lab_id": lab_id, "timestamp": f"load_{seq:08d}"}
+    if is_binary_frame(payload):
+        metadata, image = decode_frame(payload)
+        metadata.update(stamp)
+        return encode_frame(metadata, image)
+    data = json.loads(payload.decode("utf-8"))
+    data.update(stamp)
+    return json.dumps(data).encode("utf-8")
+
+
+def publish_schedule(publish, payloads: list, cameras: int, fps: float, duration: float) -> dict:
+    """
+    Open-loop load: camera c sends one frame every 1/fps seconds, phase-shifted so the
+    aggregate rate is even. Falling behind is counted, never compensated by sending slower.
+    """
+    interval = 1.0 / (fps * cameras)
+    total = int(duration * fps * cameras)
+    late = 0
+    t0 = time.perf_counter()
+    for seq in range(total):
+        due = t0 + seq * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -interval:
+            late += 1
+
+        camera = seq % cameras
+        camera_id = f"load-camera-{camera:02d}"
+        lab_id = f"lab{camera % 4:02d}"
+        payload = retarget(payloads[seq % len(payloads)], camera_id, lab_id, seq)
+        publish(f"sit/{lab_id}/{camera_id}/vision/person", payload)
+    return {"published": total, "late": late, "elapsed": time.perf_counter() - t0}
+
+
+class ResourceMonitor:
+    """Samples RSS while the run is in progress; CPU time comes from getrusage deltas."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak_rss = 0
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def rss_bytes() -> int:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def _run(self):
+        while self.running:
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+            time.sleep(self.interval)
+
+    def start(self):
+        self.usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.wall = time.perf_counter()
+        self.start_rss = self.rss_bytes()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> dict:
+        self.running = False
+        self.thread.join()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu = (usage.ru_utime - self.usage.ru_utime) + (usage.ru_stime - self.usage.ru_stime)
+        wall = time.perf_counter() - self.wall
+        return {
+            "cpu_seconds": round(cpu, 2),
+            "cpu_percent": round(100.0 * cpu / wall, 1) if wall else 0.0,
+            "rss_start_mb": round(self.start_rss / 1e6, 1),
+            "rss_peak_mb": round(max(self.peak_rss, self.rss_bytes()) / 1e6, 1),
+        }
+
+
+def load_hub(transport: str, broker: FakeBroker):
+    """Imports src/app.py, wiring its MQTT client to the fake broker if requested."""
+    original = mqtt.Client
+    if transport == "inproc":
+        mqtt.Client = lambda *args, **kwargs: FakeClient(broker)
+    try:
+        import app
+    finally:
+        mqtt.Client = original
+    return app
+
+
+def replay(args):
+    if args.log:
+        payloads = [payload for _, _, payload in read_log(args.log)]
+        if not payloads:
+            sys.exit(f"{args.log} contains no payloads.")
+    else:
+        payloads = synthetic_payloads(args.width, args.height, args.quality, args.scene)
+
+    # Keep the run's evidence files and rows out of the real hub database.
+    workdir = tempfile.mkdtemp(prefix="load_harness_")
+    os.environ.setdefault("HUB_DB_NAME", os.path.join(workdir, "load.db"))
+    os.environ.setdefault("NON_COMPLIANCE_DIR", os.path.join(workdir, "evidence"))
+
+    broker = FakeBroker() if args.transport == "inproc" else None
+    hub_log = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else hub_log):
+        app = load_hub(args.transport, broker)
+
+    # Time every frame from MQTT receipt to the end of the detection stage.
+    latencies = []
+    latency_lock = threading.Lock()
+    handler = app.detection_pool.handler
+
+    def timed_handler(job, queue_wait):
+        try:
+            handler(job, queue_wait)
+        finally:
+            elapsed = time.perf_counter() - job["t_start"]
+            with latency_lock:
+                latencies.append((time.perf_counter(), elapsed))
+
+    app.detection_pool.handler = timed_handler
+
+    if broker is not None:
+        publish = lambda topic, payload: broker.publish(topic, payload, qos=1)
+    else:
+        publisher = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        publisher.username_pw_set(app.MQTT_USER, app.MQTT_PASS)
+        publisher.connect(app.MQTT_BROKER, app.MQTT_PORT, 60)
+        publisher.loop_start()
+        publish = lambda topic, payload: publisher.publish(topic, payload, qos=1)
+
+    print(
+        f"Replaying {len(payloads)} distinct payload(s): {args.cameras} camera(s) x {args.fps} fps "
+        f"for {args.duration}s via {args.transport}..."
+    )
+    monitor = ResourceMonitor()
+    monitor.start()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else hub_log):
+        t_start = time.perf_counter()
+        sent = publish_schedule(publish, payloads, args.cameras, args.fps, args.duration)
+
+        # Drain: wait until every accepted frame has been processed or dropped.
+        deadline = time.perf_counter() + args.drain_timeout
+        while time.perf_counter() < deadline:
+            ingest = app.ingest_queue.stats()
+            accepted = ingest["enqueued"]
+            with latency_lock:
+                done = len(latencies)
+            broker_idle = broker is None or broker.pending() == 0
+            if broker_idle and accepted >= sent["published"] - ingest_rejections(app) and (
+                done + ingest["dropped_total"] >= accepted
+            ):
+                break
+            time.sleep(0.05)
+        resources = monitor.stop()
+
+    if broker is None:
+        publisher.loop_stop()
+        publisher.disconnect()
+    with contextlib.redirect_stdout(hub_log):
+        app.shutdown_services()
+
+    ingest = app.ingest_queue.stats()
+    with latency_lock:
+        samples = list(latencies)
+    processed = len(samples)
+    window = (samples[-1][0] - t_start) if samples else 0.0
+    values_ms = np.array([elapsed for _, elapsed in samples]) * 1000
+    frames = {
+        outcome: sum(
+            child.value
+            for (camera_id, label), child in app.FRAMES.children.items()
+            if label == outcome
+        )
+        for outcome in ("validated", "no_person", "decode_error")
+    }
+
+    report = {
+        "transport": args.transport,
+        "cameras": args.cameras,
+        "fps_per_camera": args.fps,
+        "offered_fps": round(args.cameras * args.fps, 2),
+        "published": sent["published"],
+        "publisher_late": sent["late"],
+        "accepted": ingest["enqueued"],
+        "processed": processed,
+        "throughput_fps": round(processed / window, 2) if window else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(values_ms, 50)), 1) if processed else None,
+            "p95": round(float(np.percentile(values_ms, 95)), 1) if processed else None,
+            "p99": round(float(np.percentile(values_ms, 99)), 1) if processed else None,
+            "max": round(float(values_ms.max()), 1) if processed else None,
+        },
+        "drops": {
+            "mqtt_rejected": ingest_rejections(app),
+            "ingest_queue": ingest["dropped_total"],
+            "evidence_queue": app.evidence_writer.stats()["dropped"],
+            "unaccounted": max(
+                0, sent["published"] - ingest_rejections(app) - ingest["enqueued"]
+            ),
+        },
+        "frames": frames,
+        "resources": resources,
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    failed = []
+    if args.min_throughput and report["throughput_fps"] < args.min_throughput:
+        failed.append(f"throughput {report['throughput_fps']} fps < {args.min_throughput}")
+    p95 = report["latency_ms"]["p95"]
+    if args.max_p95_ms and (p95 is None or p95 > args.max_p95_ms):
+        failed.append(f"p95 {p95} ms > {args.max_p95_ms}")
+    for reason in failed:
+        print(f"FAIL: {reason}")
+    # A gate is only meaningful if frames reached the costly validated path.
+    print(
+        f"{'FAIL' if failed else 'PASS'} ({frames['validated']}/{processed} frames validated, "
+        f"{frames['no_person']} no_person)"
+    )
+    if processed and not frames["validated"]:
+        print("Warning: no frame was validated; face recognition, evidence and DB were not measured.")
+    sys.exit(1 if failed else 0)
+
+
+def ingest_rejections(app) -> int:
+    """MQTT messages the hub discarded before the ingest queue (duplicates, malformed, errors)."""
+    return sum(
+        child.value
+        for (result,), child in app.MQTT_MESSAGES.children.items()
+        if result != "accepted"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Record vision payloads from a broker.")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--duration", type=float, default=60.0)
+    rec.add_argument("--max-messages", type=int, default=0)
+    rec.add_argument("--topic", default=TOPIC_FILTER)
+    rec.add_argument("--broker", default="127.0.0.1")
+    rec.add_argument("--port", type=int, default=1883)
+    rec.add_argument("--user", default="edwin")
+    rec.add_argument("--password", default="password")
+    rec.set_defaults(func=record)
+
+    rep = sub.add_parser("replay", help="Drive the hub pipeline with recorded or synthetic load.")
+    rep.add_argument("--log", help="Payload log from `record`; synthetic frames if omitted.")
+    rep.add_argument(
+        "--scene",
+        choices=("person", "empty"),
+        default="person",
+        help="Synthetic frame content (ignored with --log).",
+    )
+    rep.add_argument("--transport", choices=("inproc", "mosquitto"), default="inproc")
+    rep.add_argument("--cameras", type=int, default=4)
+    rep.add_argument("--fps", type=float, default=2.0, help="Frames per second per camera.")
+    rep.add_argument("--duration", type=float, default=30.0)
+    rep.add_argument("--drain-timeout", type=float, default=30.0)
+    rep.add_argument("--width", type=int, default=1280)
+    rep.add_argument("--height", type=int, default=720)
+    rep.add_argument("--quality", type=int, default=90)
+    rep.add_argument("--min-throughput", type=float, default=0.0)
+    rep.add_argument("--max-p95-ms", type=float, default=0.0)
+    rep.add_argument("--json", help="Also write the report to this file.")
+    rep.add_argument("--verbose", action="store_true", help="Show the hub's own log output.")
+    rep.set_defaults(func=replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,21 @@ import json
 from datetime import datetime, timezone
 import numpy as np
 import ai_edge_litert.interpreter as tflite
-from collections import deque
 import threading
 import queue
-import subprocess
+from frame_envelope import encode_frame
+from edge_pipeline import (
+    AdaptiveQuality,
+    FrameGrabber,
+    StageMeter,
+    configure_capture,
+    format_report,
+    person_crop,
+)
+from governor import Governor, SysfsSource
+from motion_gate import MotionGate
+from outbox import Outbox
+from snapshot_store import open_snapshot_store
 
 # Load MobileNet
 MODEL_PATH = "ssd_mobilenet_v2_coco_quant_postprocess.tflite"
@@ -23,8 +34,55 @@ MIN_CONFIDENCE = 0.60  # Require 60% confidence to trigger a save
 # Camera & Capture
 MAX_SNAPSHOTS = 5
 CAMERA_INDEX = 0
-ROI_COORDS = (0, 720, 0, 1280) # y1, y2, x1, x2
+CAPTURE_WIDTH, CAPTURE_HEIGHT = 1280, 720
+ROI_COORDS = (0, 720, 0, 1280) # y1, y2, x1, x2 at the full capture resolution
 CAPTURE_INTERVAL = 5
+# Local snapshots: count and byte quotas (0 MB = no byte quota). SNAPSHOT_SLOTS=1 keeps them
+# in preallocated fixed-size slot files instead of creating and deleting one file per save.
+SNAPSHOT_MAX_MB = float(os.environ.get("SNAPSHOT_MAX_MB", 0))
+SNAPSHOT_SLOTS = os.environ.get("SNAPSHOT_SLOTS", "0") == "1"
+
+# Motion gate: frames are checked for motion at MOTION_FPS and the SSD only runs while
+# the ROI is moving. Without motion it still runs every CAPTURE_INTERVAL seconds, so a
+# person standing still is not missed. MOTION_GATE=0 restores one SSD per CAPTURE_INTERVAL.
+MOTION_GATE = os.environ.get("MOTION_GATE", "1") == "1"
+MOTION_FPS = float(os.environ.get("MOTION_FPS", 10))
+MOTION_THRESHOLD = float(os.environ.get("MOTION_THRESHOLD", 0.01))  # Changed-pixel fraction.
+MOTION_HOLD = float(os.environ.get("MOTION_HOLD", 2.0))  # Seconds to keep checking after motion.
+# Minimum seconds between two published events while a person stays in view.
+EVENT_COOLDOWN = float(os.environ.get("EVENT_COOLDOWN", 1.0))
+
+# Pipeline: grabber, inference and publish stages run on separate threads.
+# By default the SSD gets every core except one, left for capture and publishing.
+TFLITE_THREADS = int(os.environ.get("TFLITE_THREADS", max(1, (os.cpu_count() or 2) - 1)))
+REPORT_INTERVAL = float(os.environ.get("REPORT_INTERVAL", 10))  # Seconds between stage reports.
+
+# Governor: trades loop rate, capture resolution and SSD threads against SoC temperature
+# and CPU load. It keeps at least GOVERNOR_TARGET_RATE loop iterations per second unless
+# the SoC reaches TEMP_MAX. GOVERNOR=0 keeps the fixed settings above.
+GOVERNOR = os.environ.get("GOVERNOR", "1") == "1"
+GOVERNOR_TARGET_RATE = float(os.environ.get("GOVERNOR_TARGET_RATE", 2.0))
+TEMP_TARGET = float(os.environ.get("TEMP_TARGET", 70.0))  # Celsius; start backing off above this.
+TEMP_MAX = float(os.environ.get("TEMP_MAX", 80.0))  # Celsius; the Pi firmware throttles at 80-85.
+CPU_BUDGET = float(os.environ.get("CPU_BUDGET", 0.85))  # Busy fraction across all cores.
+
+# Publishing: each detection is JPEG-encoded once; the same bytes are saved and published.
+# PUBLISH_CROP=1 sends only a padded crop around the detected people (the hub letterboxes it).
+PUBLISH_CROP = os.environ.get("PUBLISH_CROP", "0") == "1"
+CROP_PADDING = float(os.environ.get("CROP_PADDING", 0.15))
+# Quality adapts between these bounds to the publish backlog and the broker's ack latency.
+JPEG_QUALITY_MIN = int(os.environ.get("JPEG_QUALITY_MIN", 50))
+JPEG_QUALITY_MAX = int(os.environ.get("JPEG_QUALITY_MAX", 90))
+
+# Store-and-forward: encoded payloads are committed to an on-disk outbox and only deleted
+# once the broker acknowledges them, so broker outages do not lose evidence.
+OUTBOX_PATH = os.environ.get(
+    "OUTBOX_PATH", os.path.join(os.path.dirname(__file__), '..', 'outbox.db')
+)
+OUTBOX_MAX_ITEMS = int(os.environ.get("OUTBOX_MAX_ITEMS", 5000))
+OUTBOX_MAX_MB = float(os.environ.get("OUTBOX_MAX_MB", 200))  # Oldest payloads are evicted first.
+OUTBOX_IN_FLIGHT = int(os.environ.get("OUTBOX_IN_FLIGHT", 10))  # Unacknowledged publishes.
+OUTBOX_RATE = float(os.environ.get("OUTBOX_RATE", 5.0))  # Publishes/s, caps the post-outage drain.
 
 # Dynamically acquire the device hostname (e.g., 'edge-camera-01')
 CLIENT_ID = socket.gethostname()
@@ -44,6 +102,9 @@ COMMAND_TOPIC = f"{LOCATION}/{LAB_ID}/{CLIENT_ID}/command"
 # Global state flag to control the capture loop
 camera_active = True
 
+# Payload format: "binary" (frame envelope) or "json" (legacy base64-in-JSON).
+PAYLOAD_FORMAT = os.environ.get("PAYLOAD_FORMAT", "binary")
+
 # MQTT Settings
 MQTT_BROKER_DNS = "edwinpi.local"
 MQTT_BROKER_FALLBACK_IP = "192.168.137.98"
@@ -52,9 +113,14 @@ MQTT_USER = "edwin"
 MQTT_PASS = "password"
 
 # Initialise data structures for concurrency and memory management.
-snapshot_tracker = deque(maxlen=MAX_SNAPSHOTS)
 payload_queue = queue.Queue(maxsize=10)
 
+# Per-stage throughput, printed every REPORT_INTERVAL seconds.
+grab_meter = StageMeter("grab")
+inference_meter = StageMeter("inference")
+publish_meter = StageMeter("publish")
+jpeg_quality = AdaptiveQuality(minimum=JPEG_QUALITY_MIN, maximum=JPEG_QUALITY_MAX)
+
 # Network Callbacks & Workers
 def on_connect(client, userdata, flags, reason_code, properties):
     """Callback triggered when the edge connects to the hub."""
@@ -63,15 +129,19 @@ def on_connect(client, userdata, flags, reason_code, properties):
         # Subscribe to the command topic immediately upon connection
         client.subscribe(COMMAND_TOPIC, qos=1)
         print(f"Subscribed to command topic: {COMMAND_TOPIC}")
+        outbox.set_connected(True)
     else:
         print(f"Connection to hub failed with return code {reason_code}")
 
 def on_disconnect(client, userdata, disconnect_flags, reason_code, properties):
     """Callback triggered on unexpected disconnections."""
-    print("Warning: Unexpected disconnection from hub. Reconnecting...")
+    outbox.set_connected(False)
+    print(f"Warning: Unexpected disconnection from hub. Reconnecting... ({outbox.pending()} payload(s) held in outbox)")
 
 def on_publish(client, userdata, mid, reason_code=None, properties=None):
-    """Verifies Qos 1 delivery."""
+    """Verifies Qos 1 delivery, releases the payload from the outbox and times the ack."""
+    outbox.acked(mid)
+    jpeg_quality.acked(mid)
     print(f"[{datetime.now()}] Message ID {mid} acknowledged by broker (QoS 1).")
 
 def on_message(client, userdata, msg):
@@ -99,8 +169,9 @@ def on_message(client, userdata, msg):
 
 def mqtt_worker_thread():
     """
-    Background thread to process heavy encoding and network transmissions.
-    Prevents the main camera thread from blocking.
+    Publish stage: JPEG-encodes each detection once, then saves those bytes and hands the
+    payload to the outbox. Runs concurrently with the next inference, so disk and network
+    I/O never stall it; the outbox sender does the actual (acknowledged) publishing.
     """
     while True:
         try:
@@ -108,20 +179,36 @@ def mqtt_worker_thread():
             if item is None:
                 break # Sentinel value to terminate thread.
 
-            roi, metadata = item
+            t_start = time.perf_counter()
+            image, metadata, filename = item
+
+            # The only JPEG encode for this detection, at a quality the uplink can currently afford.
+            # Payloads waiting in the outbox count as backlog, so quality drops during outages.
+            backlog = max(
+                payload_queue.qsize() / payload_queue.maxsize,
+                min(1.0, outbox.pending() / (2 * OUTBOX_IN_FLIGHT)),
+            )
+            quality = jpeg_quality.next_quality(backlog)
+            success, buffer = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+            if not success:
+                print("Error: Failed to encode image in worker thread.")
+                continue
+            metadata["jpeg_quality"] = quality
 
-            # Offload the heavy JPEG and Base64 encoding to this thread.
-            success, buffer = cv2.imencode(".jpg", roi, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
-            if success:
-                b64_string = base64.b64encode(buffer).decode("utf-8")
-                metadata["image"] = b64_string
+            # Save the already-encoded bytes locally (no second encode); the store evicts in O(1).
+            snapshot_store.save(filename, buffer.tobytes())
 
-                # Publish with QoS 1
-                mqtt_client.publish(MQTT_TOPIC, json.dumps(metadata), qos=1)
+            if PAYLOAD_FORMAT == "json":
+                # Legacy base64-in-JSON payload for hubs that predate the binary envelope.
+                metadata["image"] = base64.b64encode(buffer).decode("utf-8")
+                payload = json.dumps(metadata)
             else:
-                print("Error: Failed to encode image in worker thread.")
+                # Raw JPEG bytes behind a small header, no base64 inflation.
+                payload = encode_frame(metadata, buffer)
 
-            payload_queue.task_done()
+            # Durable hand-off; the outbox sender publishes it with QoS 1.
+            outbox.put(MQTT_TOPIC, payload)
+            publish_meter.record(time.perf_counter() - t_start)
         except Exception as e:
             print(f"Worker thread error: {e}")
 
@@ -141,21 +228,16 @@ mqtt_client.on_disconnect = on_disconnect
 mqtt_client.on_publish = on_publish
 mqtt_client.on_message = on_message
 
-def get_cpu_temp():
-    """
-    Queries the Raspberry Pi hardware for the current CPU core temperature.
-    Returns a float representing the temperature in Celsius.
-    """
-    try:
-        # Executes the native Broadcom VideoCore command
-        result = subprocess.run(['vcgencmd', 'measure_temp'], capture_output=True, text=True)
-        # Parses the output string (e.g., "temp=55.0'C") to extract the float.
-        temp_str = result.stdout.replace("temp=", "").replace("'C\n", "")
-        return float(temp_str)
-    except Exception as e:
-        print(f"Hardware querying error: {e}")
-        return 0.0
-
+# Created before connecting, as on_connect reports to it.
+outbox = Outbox(
+    mqtt_client,
+    OUTBOX_PATH,
+    max_items=OUTBOX_MAX_ITEMS,
+    max_bytes=int(OUTBOX_MAX_MB * 1024 * 1024),
+    max_in_flight=OUTBOX_IN_FLIGHT,
+    rate=OUTBOX_RATE,
+    on_sent=jpeg_quality.sent,
+)
 
 print(f"Attempting to connect to MQTT hub at {MQTT_BROKER_DNS}...")
 try:
@@ -181,27 +263,33 @@ except Exception as e:
     print(f"Critical error: Could not establish initial connection to the hub. {e}")
     exit(1)
 
-# Start the background worker thread.
+# Start the background worker and outbox sender threads.
 worker = threading.Thread(target=mqtt_worker_thread, daemon=True)
 worker.start()
+outbox.start()
 
 # ------------------------------
 # Initialise Environment
 # ------------------------------
 SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', 'snapshot')
-os.makedirs(SNAPSHOT_DIR, exist_ok=True)
 
-# Pre-populate deque with existing files to respect MAX_SNAPSHOTS on reboot.
-existing_files = sorted(
-    [os.path.join(SNAPSHOT_DIR, f) for f in os.listdir(SNAPSHOT_DIR) if f.endswith(".jpg")],
-    key=os.path.getmtime
+# Indexes existing snapshots once, so MAX_SNAPSHOTS is respected across reboots.
+snapshot_store = open_snapshot_store(
+    SNAPSHOT_DIR,
+    MAX_SNAPSHOTS,
+    max_bytes=int(SNAPSHOT_MAX_MB * 1024 * 1024),
+    slots=SNAPSHOT_SLOTS,
 )
-for f in existing_files[-MAX_SNAPSHOTS:]:
-    snapshot_tracker.append(f)
 
 # Initialise the TensorFlow Lite interpreter
-interpreter = tflite.Interpreter(model_path=MODEL_PATH)
-interpreter.allocate_tensors()
+# num_threads lets the SSD use the cores the grabber and publisher leave free.
+def make_interpreter(threads: int):
+    """Builds the SSD interpreter; rebuilt when the governor changes the thread count."""
+    model = tflite.Interpreter(model_path=MODEL_PATH, num_threads=threads)
+    model.allocate_tensors()
+    return model
+
+interpreter = make_interpreter(TFLITE_THREADS)
 input_details = interpreter.get_input_details()
 output_details = interpreter.get_output_details()
 
@@ -214,35 +302,92 @@ if not cap.isOpened():
     print("Error: Could not open the webcam.")
     exit(1)
 
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+configure_capture(cap, CAPTURE_WIDTH, CAPTURE_HEIGHT)
+
+# Capture runs on its own thread and always holds the freshest frame.
+grabber = FrameGrabber(cap, meter=grab_meter)
+grabber.start()
+
+motion_gate = MotionGate(threshold=MOTION_THRESHOLD, hold=MOTION_HOLD)
+if MOTION_GATE:
+    loop_interval = 1.0 / MOTION_FPS if MOTION_FPS > 0 else 0.0
+else:
+    loop_interval = CAPTURE_INTERVAL
+
+# Temperature comes from sysfs (a file read) instead of spawning vcgencmd.
+thermal = SysfsSource()
+max_rate = 1.0 / loop_interval if loop_interval > 0 else 30.0
+governor = Governor(
+    thermal,
+    max_rate=max_rate,
+    target_rate=min(GOVERNOR_TARGET_RATE, max_rate),
+    min_rate=min(GOVERNOR_TARGET_RATE, max_rate, 1.0 / CAPTURE_INTERVAL),
+    max_threads=TFLITE_THREADS,
+    temp_target=TEMP_TARGET,
+    temp_max=TEMP_MAX,
+    cpu_budget=CPU_BUDGET,
+)
+settings = governor.settings
+last_inference = 0.0
+last_event = 0.0
+last_seq = 0
+next_report = time.monotonic() + REPORT_INTERVAL
 
-print("Starting continuous object detection. Press Ctrl+C to stop.")
+print(f"Starting continuous object detection ({TFLITE_THREADS} SSD thread(s)). Press Ctrl+C to stop.")
 
 # ------------------------------
-# Execution Loop with PASO Profiling
+# Inference Stage (main thread)
 # ------------------------------
 try:
     while True:
         # Check the state flag before doing any heavy lifting
         if not camera_active:
+            grabber.pause()
+            motion_gate.reset() # The scene may have changed while paused.
             time.sleep(1) # Idle in standby mode to save CPU cycles
             continue
+        grabber.pause(False)
+
+        # Apply the governor's operating point (sampled at most once per period).
+        if GOVERNOR:
+            new_settings = governor.update()
+            if new_settings != settings:
+                print(f"[{datetime.now()}] Governor: {settings} -> {new_settings} ({governor.temp:.1f} C, load {governor.load:.0%})")
+                if new_settings.threads != settings.threads:
+                    interpreter = make_interpreter(new_settings.threads)
+                if new_settings.scale != settings.scale:
+                    grabber.resize(int(CAPTURE_WIDTH * new_settings.scale), int(CAPTURE_HEIGHT * new_settings.scale))
+                    motion_gate.reset()
+                settings = new_settings
+                loop_interval = 1.0 / settings.rate
+
+        # Block until the grabber has a frame we have not looked at yet.
+        item = grabber.wait_for_frame(last_seq, timeout=1.0)
+        if item is None:
+            continue
+        last_seq, frame_time, frame = item
 
         # Start master timer
         t_start = time.perf_counter()
+        # How old the frame already was when this stage picked it up.
+        frame_age = max(0.0, time.time() - frame_time)
 
-        # --- Phase 1: Camera I/O Profiling ---
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Failed to capture frame.")
-            continue
-        t_capture = time.perf_counter()
-
-        # --- Phase 2: Pre-processing Profiling ---
+        # --- Phase 1: Pre-processing ---
         # 1. Crop Region of Interest.
+        # ROI_COORDS are defined at full resolution; scale them to the current frame.
+        sy, sx = frame.shape[0] / CAPTURE_HEIGHT, frame.shape[1] / CAPTURE_WIDTH
         y1, y2, x1, x2 = ROI_COORDS
-        roi = frame[y1:y2, x1:x2]
+        roi = frame[int(y1 * sy):int(y2 * sy), int(x1 * sx):int(x2 * sx)]
+
+        # Skip the SSD on static scenes; a periodic check still catches a still person.
+        if MOTION_GATE:
+            motion = motion_gate.update(roi)
+            if not motion:
+                if time.monotonic() - last_inference < CAPTURE_INTERVAL:
+                    time.sleep(max(0.0, loop_interval - (time.perf_counter() - t_start)))
+                    continue
+                motion_gate.record_fallback()
+        last_inference = time.monotonic()
 
         # 2. Pre-process for MobileNet SSD.
         roi_resized = cv2.resize(roi, (INPUT_WIDTH, INPUT_HEIGHT))
@@ -255,13 +400,13 @@ try:
             input_data = (np.float32(input_data) - 127.5) / 127.5
         t_preprocess = time.perf_counter()
 
-        # --- Phase 3: AI Inference Profiling ---
+        # --- Phase 2: AI Inference ---
         # 3. Execute Inference
         interpreter.set_tensor(input_details[0]['index'], input_data)
         interpreter.invoke()
         t_inference = time.perf_counter()
 
-        # --- Phase 4: Post-processing Profiling ---
+        # --- Phase 3: Post-processing ---
         # 4. Parse the Multiple Output Tensors
         # Output 0: Bounding box coordinates [ymin, xmin, ymax, xmax]
         # Output 1: Class indices
@@ -270,81 +415,97 @@ try:
         classes = interpreter.get_tensor(output_details[1]['index'])[0]
         scores = interpreter.get_tensor(output_details[2]['index'])[0]
 
-        person_detected = False
-
-        # Iterate through the detections to find a confident person match
-        for i in range(len(scores)):
-            if scores[i] > MIN_CONFIDENCE and int(classes[i]) == PERSON_CLASS_INDEX:
-                person_detected = True
-                confidence_pct = scores[i] * 100
-                print(f"[{datetime.now()}] Person detected! Confidence: {confidence_pct:.1f}%")
-                # Optional: Extract bounding box coordinates here if you wish 
-                # ymin, xmin, ymax, xmax = boxes[i]
-                break
+        # Keep every confident person match; the boxes travel with the payload.
+        persons = [
+            i
+            for i in range(len(scores))
+            if scores[i] > MIN_CONFIDENCE and int(classes[i]) == PERSON_CLASS_INDEX
+        ]
+        person_boxes = [boxes[i] for i in persons]
+        person_detected = bool(persons)
+        if person_detected:
+            confidence_pct = float(max(scores[i] for i in persons)) * 100
+            print(f"[{datetime.now()}] {len(persons)} person(s) detected! Confidence: {confidence_pct:.1f}%")
 
         # 5. Handle Detections
-        if person_detected:
-            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        # While a person stays in view, publish at most one event per EVENT_COOLDOWN.
+        if person_detected and time.monotonic() - last_event >= EVENT_COOLDOWN:
+            last_event = time.monotonic()
+            # Milliseconds keep two incidents within one second from sharing a filename.
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")[:-3]
             filename = f"{CLIENT_ID}_snapshot_{timestamp}.jpg"
-            filepath = os.path.join(SNAPSHOT_DIR, filename)
-
-            # Efficient local storage management via deque.
-            if len(snapshot_tracker) == MAX_SNAPSHOTS:
-                oldest_file = snapshot_tracker.popleft()
-                try:
-                    os.remove(oldest_file)
-                except OSError as e:
-                    print(f"Warning: Could not delete {oldest_file}. {e}")
 
-            # Save to disk locally
-            cv2.imwrite(filepath, roi, [cv2.IMWRITE_JPEG_QUALITY, 95])
-            snapshot_tracker.append(filepath)
-
-            # Construct metadata and pass to the queue (non-blocking)
+            # Construct metadata and pass to the publish stage (non-blocking)
             payload_metadata = {
                 "camera_id": CLIENT_ID,
                 "location": LOCATION,
                 "lab_id": LAB_ID,
                 "timestamp": timestamp,
-                "confidence": float(confidence_pct)
+                "confidence": confidence_pct,
+                # Stage timings (ms) so the hub can aggregate edge latency in /metrics.
+                "timings": {
+                    "capture": round(frame_age * 1000, 2),
+                    "preprocess": round((t_preprocess - t_start) * 1000, 2),
+                    "inference": round((t_inference - t_preprocess) * 1000, 2),
+                },
             }
 
+            image = person_crop(roi, person_boxes, CROP_PADDING) if PUBLISH_CROP else roi
+
             if not payload_queue.full():
-                # Pass a copy of the ROI to prevent it being overwritten by the next frame
-                payload_queue.put((roi.copy(), payload_metadata))
+                # The grabber allocates a new matrix per frame, so the ROI view stays valid.
+                payload_queue.put((image, payload_metadata, filename))
+            else:
+                # Only hit if JPEG encoding falls behind; network outages are absorbed by the outbox.
+                print("Warning: Encode queue is full. Dropping payload to maintain framerate.")
+
+        inference_meter.record(time.perf_counter() - t_start)
+
+        # --- Periodic per-stage throughput report ---
+        if time.monotonic() >= next_report:
+            next_report = time.monotonic() + REPORT_INTERVAL
+            print(f"\n--- Pipeline Report ({REPORT_INTERVAL:.0f}s) ---")
+            print(format_report([grab_meter, inference_meter, publish_meter]))
+            box = outbox.stats()
+            print(
+                f"Encode backlog: {payload_queue.qsize()}/{payload_queue.maxsize} | "
+                f"Outbox: {box['pending']} pending ({box['bytes'] / 1e6:.1f} MB), "
+                f"{box['in_flight']} in flight, {box['evicted']} evicted"
+            )
+            print(
+                f"JPEG quality: {jpeg_quality.quality} | ack {jpeg_quality.ack_latency * 1000:.0f} ms, "
+                f"{jpeg_quality.throughput / 1000:.0f} kB/s"
+            )
+            if GOVERNOR:
+                gov = governor.stats()
+                print(
+                    f"Core Temp: {gov['temp']} Celsius | CPU load: {gov['load']:.0%} | "
+                    f"Governor level {gov['level']}/{gov['levels'] - 1}: {gov['rate']:g}/s, "
+                    f"{gov['threads']} thread(s), scale {gov['scale']}"
+                    + (" (below target rate)" if gov['below_target'] else "")
+                )
             else:
-                print("Warning: Network queue is full. Dropping payload to maintain framerate.")
+                print(f"Core Temp: {thermal.read_temp()} Celsius")
+            if MOTION_GATE:
+                gate = motion_gate.stats()
+                print(
+                    f"Motion Score: {gate['score']:.4f} (SSD skipped on {gate['skipped']}/{gate['frames']} frames, "
+                    f"{gate['fallback']} periodic fallback run(s))"
+                )
+            print(f"--------------------------\n")
 
-        else:
-            print(f"[{datetime.now()}] Clear. No person detected.")
-        
-        # --- Output PASO Profiling Metrics ---
-        # Convert seconds to milliseconds for granular analysis
-        t_postprocess = time.perf_counter()
-        time_capture = (t_capture - t_start) * 1000
-        time_prep = (t_preprocess - t_capture) * 1000
-        time_inf = (t_inference - t_preprocess) * 1000
-        time_post = (t_postprocess - t_inference) * 1000
-        time_total = (t_postprocess - t_start) * 1000
-        current_temp = get_cpu_temp()
-
-        print(f"\n--- Profiling Report ---")
-        print(f"Camera I/O: {time_capture:.1f} ms")
-        print(f"Pre-processing: {time_prep:.1f} ms")
-        print(f"AI Inference: {time_inf:.1f} ms")
-        print(f"Post-processing: {time_post:.1f} ms")
-        print(f"Total Loop: {time_total:.1f} ms")
-        print(f"Core Temp: {current_temp} Celsius")
-        print(f"--------------------------\n")
-
-        time.sleep(CAPTURE_INTERVAL)
+        time.sleep(max(0.0, loop_interval - (time.perf_counter() - t_start)))
 
 except KeyboardInterrupt:
     print("\nStopping capture...")
 
 finally:
+    grabber.stop()
     cap.release()
     # Safely terminate the background thread and network client.
     payload_queue.put(None)
-    mqtt_client.loop_stop()
+    worker.join(timeout=2.0)
+    # Stop the network thread first: a late PUBACK must not reach a closed outbox.
     mqtt_client.disconnect()
+    mqtt_client.loop_stop()
+    outbox.stop() # Unacknowledged payloads stay on disk for the next run.
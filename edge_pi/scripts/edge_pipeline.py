@@ -0,0 +1,244 @@
+import threading
+import time
+
+import cv2
+
+
+class FrameGrabber:
+    """
+    Dedicated capture thread that always holds the freshest camera frame.
+
+    cap.read() runs continuously, so V4L2 never accumulates stale buffers while the
+    inference stage is busy. Consumers block for "a frame newer than seq N" and always
+    receive the newest one; frames nobody asked for are simply overwritten.
+    """
+
+    def __init__(self, cap, meter=None):
+        self.cap = cap
+        self.meter = meter
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.timestamp = 0.0
+        self.frame = None
+        self.paused = False
+        self.pending_size = None  # (width, height) to apply between two reads.
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Spawns the grabber thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            if self.paused:
+                time.sleep(0.1)
+                continue
+            if self.pending_size is not None:
+                width, height = self.pending_size
+                self.pending_size = None
+                configure_capture(self.cap, width, height)
+
+            t_start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("Error: Failed to capture frame.")
+                time.sleep(0.1)  # Device missing or busy; do not spin.
+                continue
+
+            with self.cond:
+                self.frame = frame
+                self.timestamp = time.time()
+                self.seq += 1
+                self.cond.notify_all()
+            if self.meter is not None:
+                self.meter.record(time.perf_counter() - t_start)
+
+    def pause(self, paused: bool = True):
+        """Stops reading from the camera (e.g. in standby) without closing it."""
+        self.paused = paused
+
+    def resize(self, width: int, height: int):
+        """Changes the capture resolution; applied by the grabber thread before its next read."""
+        self.pending_size = (width, height)
+
+    def wait_for_frame(self, after_seq: int, timeout: float = 1.0):
+        """
+        Blocks until a frame newer than `after_seq` has been captured.
+
+        Returns:
+            tuple | None: (seq, timestamp, frame), or None on timeout.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq, timeout):
+                return None
+            return self.seq, self.timestamp, self.frame
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+
+class StageMeter:
+    """Thread-safe throughput and latency counter for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.total = 0
+        self.window_count = 0
+        self.window_busy = 0.0
+        self.window_start = time.perf_counter()
+
+    def record(self, duration: float):
+        """Counts one item that kept the stage busy for `duration` seconds."""
+        with self.lock:
+            self.total += 1
+            self.window_count += 1
+            self.window_busy += duration
+
+    def report(self) -> dict:
+        """Returns items/s and mean latency since the previous report, then starts a new window."""
+        now = time.perf_counter()
+        with self.lock:
+            elapsed = now - self.window_start
+            count, busy = self.window_count, self.window_busy
+            self.window_count, self.window_busy, self.window_start = 0, 0.0, now
+        return {
+            "fps": count / elapsed if elapsed > 0 else 0.0,
+            "mean_ms": busy / count * 1000 if count else 0.0,
+            # Share of wall time the stage was busy; near 100% marks the bottleneck.
+            "utilisation": busy / elapsed if elapsed > 0 else 0.0,
+            "total": self.total,
+        }
+
+
+def format_report(meters: list) -> str:
+    """One line per stage, e.g. for the periodic console report."""
+    lines = []
+    for meter in meters:
+        r = meter.report()
+        lines.append(
+            f"{meter.name:<10} {r['fps']:6.1f} fps | {r['mean_ms']:7.1f} ms | "
+            f"{r['utilisation'] * 100:5.1f}% busy | {r['total']} total"
+        )
+    return "\n".join(lines)
+
+
+def configure_capture(cap, width: int, height: int):
+    """Requests the capture size and the shallowest driver queue the backend allows."""
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    # Not every V4L2 driver honours this; the grabber thread keeps frames fresh regardless.
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+
+def pixel_boxes(image, boxes: list) -> list:
+    """Converts SSD boxes (normalised [ymin, xmin, ymax, xmax]) to [x1, y1, x2, y2] pixels."""
+    h, w = image.shape[:2]
+    return [
+        [int(xmin * w), int(ymin * h), int(xmax * w), int(ymax * h)]
+        for ymin, xmin, ymax, xmax in boxes
+    ]
+
+
+def person_crop(image, boxes: list, padding: float = 0.15):
+    """
+    Crops the image to the union of the person boxes, padded on every side.
+
+    Boxes are clamped to the image first. If none has any area left (degenerate or
+    entirely outside the frame), the whole image is returned instead of an empty crop.
+
+    Args:
+        image (np.ndarray): The ROI the SSD ran on.
+        boxes (list): SSD boxes as normalised [ymin, xmin, ymax, xmax].
+        padding (float): Extra margin as a fraction of the union box's width/height.
+
+    Returns:
+        np.ndarray: The crop (a view into `image`), or `image` itself.
+    """
+    h, w = image.shape[:2]
+    people = [
+        [max(0, x1), max(0, y1), min(w, x2), min(h, y2)]
+        for x1, y1, x2, y2 in pixel_boxes(image, boxes)
+    ]
+    people = [b for b in people if b[2] > b[0] and b[3] > b[1]]
+    if not people:
+        return image
+
+    x1 = min(b[0] for b in people)
+    y1 = min(b[1] for b in people)
+    x2 = max(b[2] for b in people)
+    y2 = max(b[3] for b in people)
+    pad_x = int((x2 - x1) * padding)
+    pad_y = int((y2 - y1) * padding)
+    x1, y1 = max(0, x1 - pad_x), max(0, y1 - pad_y)
+    x2, y2 = min(w, x2 + pad_x), min(h, y2 + pad_y)
+    return image[y1:y2, x1:x2]
+
+
+class AdaptiveQuality:
+    """
+    Chooses the JPEG quality of the next publish from the publish backlog and the
+    measured QoS 1 acknowledgement latency (a proxy for the uplink's spare bandwidth).
+
+    Quality drops quickly when payloads queue up or acks slow down, and recovers one
+    step at a time once the link is idle again.
+    """
+
+    def __init__(
+        self,
+        minimum: int = 50,
+        maximum: int = 90,
+        step: int = 5,
+        target_latency: float = 0.5,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.target_latency = target_latency
+
+        self.quality = maximum
+        self.lock = threading.Lock()
+        self.pending = {}  # key: MQTT mid, value: (send time, payload bytes)
+        self.ack_latency = 0.0  # Smoothed seconds from publish to PUBACK.
+        self.throughput = 0.0  # Smoothed payload bytes per second of ack latency.
+
+    def sent(self, mid: int, size: int):
+        """Remembers a QoS 1 publish so its ack can be timed."""
+        with self.lock:
+            self.pending[mid] = (time.monotonic(), size)
+            if len(self.pending) > 256:
+                # Acks lost across a reconnect would otherwise accumulate forever.
+                self.pending.pop(next(iter(self.pending)))
+
+    def acked(self, mid: int):
+        """Feeds one PUBACK into the latency and bandwidth estimates."""
+        with self.lock:
+            entry = self.pending.pop(mid, None)
+            if entry is None:
+                return  # Acked before sent() ran, or not one of ours.
+            latency = time.monotonic() - entry[0]
+            self.ack_latency = 0.7 * self.ack_latency + 0.3 * latency
+            if latency > 0:
+                self.throughput = 0.7 * self.throughput + 0.3 * (entry[1] / latency)
+
+    def next_quality(self, backlog: float) -> int:
+        """
+        Args:
+            backlog (float): Publish queue fill ratio in [0, 1].
+
+        Returns:
+            int: JPEG quality to encode the next payload with.
+        """
+        with self.lock:
+            unacked = len(self.pending)
+            if backlog >= 0.5 or self.ack_latency > self.target_latency:
+                self.quality = max(self.minimum, self.quality - 2 * self.step)
+            elif backlog == 0 and unacked <= 1 and self.ack_latency < self.target_latency / 2:
+                self.quality = min(self.maximum, self.quality + self.step)
+            return self.quality
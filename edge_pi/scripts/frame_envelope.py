@@ -0,0 +1,23 @@
+import json
+import struct
+
+# Binary frame envelope (v1) shared with the hub (src/frame_envelope.py).
+#
+#   offset  size  field
+#   0       4     magic b"SITF"
+#   4       1     version (currently 1)
+#   5       1     flags (reserved, 0)
+#   6       2     metadata length N (big-endian uint16)
+#   8       N     UTF-8 JSON metadata
+#   8 + N   ...   raw JPEG bytes
+MAGIC = b"SITF"
+VERSION = 1
+HEADER = struct.Struct(">4sBBH")
+
+def encode_frame(metadata, jpeg_bytes):
+    """
+    Packs the metadata dict and the JPEG buffer (bytes or numpy array) into one payload.
+    Replaces base64-in-JSON, which inflated every frame by a third.
+    """
+    meta = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    return b"".join([HEADER.pack(MAGIC, VERSION, 0, len(meta)), meta, memoryview(jpeg_bytes)])
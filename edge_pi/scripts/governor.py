@@ -0,0 +1,220 @@
+import time
+from collections import namedtuple
+
+# One operating point of the edge pipeline.
+#   rate:    loop iterations (motion checks / SSD runs) per second
+#   threads: TFLite interpreter threads
+#   scale:   capture resolution as a fraction of the full 1280x720
+Settings = namedtuple("Settings", ["rate", "threads", "scale"])
+
+
+class SysfsSource:
+    """
+    Reads SoC temperature and CPU load straight from sysfs/procfs.
+
+    Both are plain file reads (a few microseconds), unlike spawning `vcgencmd`. Any object
+    with read_temp() and read_load() can stand in for it, e.g. TraceSource in simulations.
+    """
+
+    def __init__(
+        self,
+        thermal_path: str = "/sys/class/thermal/thermal_zone0/temp",
+        stat_path: str = "/proc/stat",
+    ):
+        self.thermal_path = thermal_path
+        self.stat_path = stat_path
+        self.last_busy = None
+        self.last_total = None
+
+    def read_temp(self) -> float:
+        """Returns the SoC temperature in Celsius, or 0.0 if the sensor is unavailable."""
+        try:
+            with open(self.thermal_path) as f:
+                return int(f.read().strip()) / 1000.0  # The kernel reports millidegrees.
+        except (OSError, ValueError):
+            return 0.0
+
+    def read_load(self) -> float:
+        """Returns the fraction of CPU time spent busy since the previous call, in [0, 1]."""
+        try:
+            with open(self.stat_path) as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return 0.0
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        total = sum(fields[:8])  # guest time is already counted in user/nice.
+        busy = total - idle
+
+        if self.last_total is None or total <= self.last_total:
+            self.last_busy, self.last_total = busy, total
+            return 0.0
+        load = (busy - self.last_busy) / (total - self.last_total)
+        self.last_busy, self.last_total = busy, total
+        return min(1.0, max(0.0, load))
+
+
+class TraceSource:
+    """Replays synthetic temperature and load traces, one sample per read."""
+
+    def __init__(self, temps: list, loads: list = None):
+        self.temps = list(temps)
+        self.loads = list(loads) if loads is not None else [0.0] * len(self.temps)
+        self.index = 0
+
+    def advance(self):
+        self.index = min(self.index + 1, len(self.temps) - 1)
+
+    def read_temp(self) -> float:
+        return self.temps[self.index]
+
+    def read_load(self) -> float:
+        return self.loads[min(self.index, len(self.loads) - 1)]
+
+
+class Governor:
+    """
+    Thermal- and load-aware controller for the edge capture pipeline.
+
+    The governor walks a ladder of operating points ordered from most to least expensive:
+    first the loop rate drops towards `target_rate`, then the capture resolution, then the
+    number of SSD threads. Everything down to that point still meets the target detection
+    rate. Only when the SoC reaches `temp_max` does it go further and cut the rate towards
+    `min_rate`, trading detections for staying below the firmware's throttling point.
+
+    It steps down one level per `period` while over the thermal or CPU budget, and back up
+    one level once both are comfortably below it again, so settings never oscillate.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        max_rate: float = 10.0,
+        target_rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_threads: int = 3,
+        scales: tuple = (1.0, 0.75, 0.5),
+        temp_target: float = 70.0,
+        temp_max: float = 80.0,
+        cpu_budget: float = 0.85,
+        hysteresis: float = 5.0,
+        period: float = 5.0,
+    ):
+        """
+        Args:
+            source: Temperature/load source; defaults to SysfsSource().
+            max_rate (float): Loop rate (per second) when there is thermal headroom.
+            target_rate (float): Lowest loop rate used before temp_max is reached.
+            min_rate (float): Absolute floor for the loop rate at or above temp_max.
+            max_threads (int): SSD interpreter threads when there is headroom.
+            scales (tuple): Capture resolution scales, from full to smallest.
+            temp_target (float): Celsius above which the governor starts to back off.
+            temp_max (float): Celsius at which the target detection rate is given up.
+            cpu_budget (float): Busy fraction of all cores the pipeline may cause.
+            hysteresis (float): Degrees below temp_target required before stepping back up.
+            period (float): Seconds between two adjustments.
+        """
+        self.source = source if source is not None else SysfsSource()
+        self.temp_target = temp_target
+        self.temp_max = temp_max
+        self.cpu_budget = cpu_budget
+        self.hysteresis = hysteresis
+        self.period = period
+
+        self.levels, self.normal_floor = self._build_ladder(
+            max_rate, target_rate, min_rate, max_threads, scales
+        )
+        self.level = 0
+        self.last_change = float("-inf")
+        self.temp = 0.0
+        self.load = 0.0
+
+    @staticmethod
+    def _build_ladder(max_rate, target_rate, min_rate, max_threads, scales) -> tuple:
+        """Returns (levels, index of the cheapest level that still meets target_rate)."""
+        levels = []
+        rate = max_rate
+        while rate > target_rate:
+            levels.append(Settings(rate, max_threads, scales[0]))
+            rate /= 2
+        for scale in scales:
+            levels.append(Settings(target_rate, max_threads, scale))
+        for threads in range(max_threads - 1, 0, -1):
+            levels.append(Settings(target_rate, threads, scales[-1]))
+        # Emergency levels below the target detection rate, only used at temp_max.
+        normal_floor = len(levels) - 1
+        rate = target_rate / 2
+        while rate > min_rate:
+            levels.append(Settings(rate, 1, scales[-1]))
+            rate /= 2
+        if min_rate < levels[-1].rate:
+            levels.append(Settings(min_rate, 1, scales[-1]))
+        return levels, normal_floor
+
+    @property
+    def settings(self) -> Settings:
+        return self.levels[self.level]
+
+    def update(self, now: float = None) -> Settings:
+        """
+        Samples the source at most once per `period` and returns the settings to run with.
+
+        Args:
+            now (float | None): Monotonic time in seconds; defaults to time.monotonic().
+
+        Returns:
+            Settings: The current operating point.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self.last_change < self.period:
+            return self.settings
+
+        self.temp = self.source.read_temp()
+        self.load = self.source.read_load()
+        self.last_change = now
+
+        critical = self.temp >= self.temp_max
+        over_budget = self.temp > self.temp_target or self.load > self.cpu_budget
+        headroom = (
+            self.temp < self.temp_target - self.hysteresis
+            and self.load < self.cpu_budget - 0.1
+        )
+
+        floor = len(self.levels) - 1 if critical else self.normal_floor
+        if critical:
+            # Two steps at once: firmware throttling is only a few degrees away.
+            self.level = min(floor, self.level + 2)
+        elif self.level > floor:
+            self.level -= 1  # Recovered from critical: climb back to the target rate first.
+        elif over_budget:
+            self.level = min(floor, self.level + 1)
+        elif headroom:
+            self.level = max(0, self.level - 1)
+        return self.settings
+
+    def stats(self) -> dict:
+        settings = self.settings
+        return {
+            "temp": round(self.temp, 1),
+            "load": round(self.load, 3),
+            "level": self.level,
+            "levels": len(self.levels),
+            "rate": settings.rate,
+            "threads": settings.threads,
+            "scale": settings.scale,
+            "below_target": self.level > self.normal_floor,
+        }
+
+
+def simulate(governor: Governor, source: TraceSource, steps: int) -> list:
+    """
+    Drives the governor through a synthetic trace, one sample per period.
+
+    Returns:
+        list: (temperature, load, Settings) for every step.
+    """
+    history = []
+    for step in range(steps):
+        settings = governor.update(now=step * governor.period)
+        history.append((source.read_temp(), source.read_load(), settings))
+        source.advance()
+    return history
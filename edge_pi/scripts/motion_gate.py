@@ -0,0 +1,102 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap motion pre-filter that decides whether a frame is worth running the SSD on.
+
+    Each frame is shrunk to a small grayscale thumbnail and compared against a running-
+    average background (cv2.accumulateWeighted), so slow lighting changes are absorbed.
+    The gate opens when the fraction of changed pixels exceeds `threshold` and stays open
+    for `hold` seconds, so a person who stops moving is still checked for a while.
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        threshold: float = 0.01,
+        pixel_delta: int = 25,
+        alpha: float = 0.05,
+        hold: float = 2.0,
+    ):
+        """
+        Args:
+            width (int): Thumbnail width in pixels; height keeps the frame's aspect ratio.
+            threshold (float): Fraction of thumbnail pixels that must change to count as motion.
+            pixel_delta (int): Minimum grey-level difference for a pixel to count as changed.
+            alpha (float): Background learning rate; higher adapts faster to scene changes.
+            hold (float): Seconds the gate stays open after the last motion.
+        """
+        self.width = width
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.alpha = alpha
+        self.hold = hold
+
+        self.background = None
+        self.last_motion = 0.0
+        self.score = 0.0  # Changed-pixel fraction of the latest frame.
+
+        # Counters, exposed through stats().
+        self.frames = 0
+        self.opened = 0
+        self.fallback = 0  # Closed-gate frames the caller ran the SSD on anyway.
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        # Suppress sensor noise so it is not mistaken for motion.
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def update(self, frame: np.ndarray) -> bool:
+        """
+        Feeds one frame (typically the ROI crop) and returns True if the SSD should run.
+        The first frame always opens the gate, as there is no background to compare with.
+        """
+        now = time.monotonic()
+        gray = self._thumbnail(frame)
+        self.frames += 1
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.last_motion = now
+            self.opened += 1
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        _, mask = cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)
+        self.score = cv2.countNonZero(mask) / mask.size
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+
+        if self.score >= self.threshold:
+            self.last_motion = now
+
+        is_open = now - self.last_motion <= self.hold
+        if is_open:
+            self.opened += 1
+        return is_open
+
+    def record_fallback(self):
+        """Called when the SSD ran on a frame the gate rejected (periodic still check)."""
+        self.fallback += 1
+
+    def reset(self):
+        """Forgets the background, e.g. after the camera was paused."""
+        self.background = None
+
+    def stats(self) -> dict:
+        """
+        Returns how many frames were seen, passed the gate, ran as a periodic fallback
+        and were skipped (no inference at all).
+        """
+        return {
+            "frames": self.frames,
+            "opened": self.opened,
+            "fallback": self.fallback,
+            "skipped": self.frames - self.opened - self.fallback,
+            "score": round(self.score, 4),
+        }
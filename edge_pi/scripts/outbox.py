@@ -0,0 +1,252 @@
+import sqlite3
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+# An ack can beat the in_flight bookkeeping by the few microseconds between publish()
+# returning and the sender taking the lock. Unclaimed acks older than this are stale
+# (e.g. the late original ack of a re-sent payload) and must not match a reused mid.
+EARLY_ACK_TTL = 2.0
+
+
+class Outbox:
+    """
+    Disk-backed store-and-forward queue for QoS 1 publishes.
+
+    Every payload is committed to a small SQLite table before it is sent, and a row is
+    only deleted once the broker's PUBACK arrives (see acked(), called from on_publish).
+    Payloads therefore survive broker outages and reboots. The table is capped by count
+    and bytes; when full, the oldest payloads are evicted first. A sender thread keeps at
+    most `max_in_flight` unacknowledged publishes and drains any backlog at `rate`
+    messages per second after a reconnect, so it never floods the uplink or the hub.
+    """
+
+    def __init__(
+        self,
+        client,
+        path: str,
+        max_items: int = 5000,
+        max_bytes: int = 200 * 1024 * 1024,
+        max_in_flight: int = 10,
+        rate: float = 5.0,
+        ack_timeout: float = 30.0,
+        on_sent=None,
+    ):
+        """
+        Args:
+            client (mqtt.Client): Connected (or connecting) paho client used to publish.
+            path (str): SQLite file holding the queued payloads.
+            max_items (int): Maximum number of queued payloads.
+            max_bytes (int): Maximum total payload bytes on disk.
+            max_in_flight (int): Maximum publishes awaiting a PUBACK.
+            rate (float): Maximum publishes per second (bulk drain after an outage).
+            ack_timeout (float): Seconds after which an unacknowledged publish is re-sent.
+                The hub deduplicates repeated payloads by hash.
+            on_sent (callable | None): Called as on_sent(mid, size) after each publish.
+        """
+        self.client = client
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.ack_timeout = ack_timeout
+        self.on_sent = on_sent
+
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL with NORMAL sync: one fsync per checkpoint rather than per payload (SD card wear).
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+
+        self.cond = threading.Condition()
+        self.count, self.bytes = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outbox"
+        ).fetchone()
+        self.in_flight = {}  # key: MQTT mid, value: (row id, send time)
+        self.early_acks = {}  # key: MQTT mid, value: monotonic time its PUBACK arrived
+        self.is_connected = False
+        self.running = False
+        self.closed = False
+        self.thread = None
+
+        # Counters, exposed through stats().
+        self.sent = 0
+        self.delivered = 0
+        self.evicted = 0
+        self.retried = 0
+
+        if self.count:
+            print(f"[OUTBOX] Recovered {self.count} unsent payload(s) from {path}.")
+
+    def start(self):
+        """Spawns the sender thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="outbox-sender", daemon=True)
+        self.thread.start()
+
+    def put(self, topic: str, payload: bytes):
+        """Durably queues one payload; evicts the oldest ones if a quota would be exceeded."""
+        size = len(payload)
+        with self.cond:
+            self.db.execute(
+                "INSERT INTO outbox (topic, payload, size, created_at) VALUES (?, ?, ?, ?)",
+                (topic, payload, size, time.time()),
+            )
+            self.count += 1
+            self.bytes += size
+            self._evict()
+            self.cond.notify_all()
+
+    def _evict(self):
+        """Deletes the oldest rows until both quotas hold. Caller holds the lock."""
+        while self.count > self.max_items or (self.bytes > self.max_bytes and self.count > 1):
+            row_id, size = self.db.execute(
+                "SELECT id, size FROM outbox ORDER BY id LIMIT 1"
+            ).fetchone()
+            self.db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            self.count -= 1
+            self.bytes -= size
+            self.evicted += 1
+            print(f"[OUTBOX] Warning: Quota reached. Evicted oldest payload {row_id}.")
+
+    def set_connected(self, connected: bool):
+        """Called from on_connect / on_disconnect; sending pauses while offline."""
+        with self.cond:
+            self.is_connected = connected
+            if connected:
+                # paho re-sends its unacknowledged messages on reconnect; give them a fresh
+                # ack window instead of publishing them a second time.
+                now = time.monotonic()
+                for mid, (row_id, _) in self.in_flight.items():
+                    self.in_flight[mid] = (row_id, now)
+            self.cond.notify_all()
+
+    def acked(self, mid: int):
+        """Called from on_publish: the broker has the payload, so drop it from disk."""
+        with self.cond:
+            if self.closed:
+                return  # A PUBACK that arrived after stop(); the row is re-sent next run.
+            entry = self.in_flight.pop(mid, None)
+            if entry is None:
+                now = time.monotonic()
+                for stale in [m for m, t in self.early_acks.items() if now - t > EARLY_ACK_TTL]:
+                    del self.early_acks[stale]
+                self.early_acks[mid] = now
+                return
+            self._delete(entry[0])
+            self.cond.notify_all()
+
+    def _delete(self, row_id: int):
+        row = self.db.execute("SELECT size FROM outbox WHERE id = ?", (row_id,)).fetchone()
+        if row is None:
+            return  # Already evicted while in flight.
+        self.db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+        self.count -= 1
+        self.bytes -= row[0]
+        self.delivered += 1
+
+    def _ready(self) -> bool:
+        return not self.running or (
+            self.is_connected
+            and len(self.in_flight) < self.max_in_flight
+            and self.count > len(self.in_flight)
+        )
+
+    def _expire_in_flight(self):
+        """Forgets publishes whose ack never came, so they are sent again. Caller holds the lock."""
+        if not self.is_connected:
+            return
+        now = time.monotonic()
+        for mid, (_, sent_at) in list(self.in_flight.items()):
+            if now - sent_at > self.ack_timeout:
+                del self.in_flight[mid]
+                self.retried += 1
+
+    def _run(self):
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        next_send = 0.0
+
+        while True:
+            with self.cond:
+                self._expire_in_flight()
+                self.cond.wait_for(self._ready, timeout=1.0)
+                if not self.running:
+                    break
+                if not self._ready():
+                    continue
+                busy = [row_id for row_id, _ in self.in_flight.values()]
+                row = self.db.execute(
+                    f"""
+                    SELECT id, topic, payload FROM outbox
+                    WHERE id NOT IN ({", ".join("?" * len(busy))})
+                    ORDER BY id LIMIT 1
+                    """,
+                    busy,
+                ).fetchone()
+            if row is None:
+                continue
+
+            # Rate limit: bulk drains after an outage are spread out, not fired at once.
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_send = time.monotonic() + interval
+
+            row_id, topic, payload = row
+            info = self.client.publish(topic, payload, qos=1)
+            if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+                # Rejected outright; the row stays queued for the next attempt.
+                time.sleep(1.0)
+                continue
+            # On NO_CONN paho keeps the message and sends it after the reconnect, so it
+            # counts as in flight either way.
+
+            with self.cond:
+                self.sent += 1
+                acked_at = self.early_acks.pop(info.mid, None)
+                if acked_at is not None and time.monotonic() - acked_at <= EARLY_ACK_TTL:
+                    self._delete(row_id)
+                else:
+                    self.in_flight[info.mid] = (row_id, time.monotonic())
+            if self.on_sent is not None:
+                self.on_sent(info.mid, len(payload))
+
+    def pending(self) -> int:
+        """Number of payloads on disk that have not been acknowledged yet."""
+        with self.cond:
+            return self.count
+
+    def stop(self, timeout: float = 2.0):
+        """Stops the sender; unacknowledged payloads stay on disk for the next start."""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+        with self.cond:
+            self.closed = True
+            self.db.close()
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "pending": self.count,
+                "bytes": self.bytes,
+                "in_flight": len(self.in_flight),
+                "sent": self.sent,
+                "delivered": self.delivered,
+                "evicted": self.evicted,
+                "retried": self.retried,
+            }
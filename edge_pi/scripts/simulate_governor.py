@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Drives the edge Governor through synthetic temperature/load traces and checks its decisions.
+
+Each scenario replays one trace (one sample per governor period) and asserts how the
+operating point must respond. Exits with status 1 if any check fails, so it can gate
+changes to governor.py without a camera or a Raspberry Pi.
+
+Usage:
+    python simulate_governor.py [--verbose]
+"""
+import argparse
+import sys
+
+from governor import Governor, TraceSource, simulate
+
+TARGET_RATE = 2.0
+
+
+def ramp(start: float, end: float, steps: int) -> list:
+    return [start + (end - start) * i / max(1, steps - 1) for i in range(steps)]
+
+
+def make_governor(source) -> Governor:
+    return Governor(
+        source,
+        max_rate=10.0,
+        target_rate=TARGET_RATE,
+        min_rate=0.2,
+        max_threads=3,
+        temp_target=70.0,
+        temp_max=80.0,
+        cpu_budget=0.85,
+    )
+
+
+def scenario_cool():
+    """Idle, cool device: full rate, threads and resolution throughout."""
+    source = TraceSource([50.0] * 40, [0.3] * 40)
+    history = simulate(make_governor(source), source, 40)
+    return [
+        ("stays at full settings", all(s == history[0][2] for _, _, s in history)),
+        ("full rate", history[-1][2].rate == 10.0),
+    ]
+
+
+def scenario_heat_soak():
+    """Slow heat soak to just under temp_max: back off, but keep the target detection rate."""
+    temps = ramp(50.0, 77.0, 60) + [77.0] * 60
+    source = TraceSource(temps, [0.5] * len(temps))
+    governor = make_governor(source)
+    history = simulate(governor, source, len(temps))
+    final = history[-1][2]
+    return [
+        ("backed off", final != governor.levels[0]),
+        ("never below target rate", all(s.rate >= TARGET_RATE for _, _, s in history)),
+        ("resolution reduced", final.scale < 1.0),
+    ]
+
+
+def scenario_spike_and_recover():
+    """A burst to temp_max gives up the target rate, then everything recovers once cool."""
+    temps = [60.0] * 10 + [82.0] * 10 + ramp(82.0, 55.0, 20) + [55.0] * 60
+    source = TraceSource(temps, [0.5] * len(temps))
+    governor = make_governor(source)
+    history = simulate(governor, source, len(temps))
+    during_spike = [s for t, _, s in history[10:20]]
+    return [
+        ("below target rate while critical", min(s.rate for s in during_spike) < TARGET_RATE),
+        ("reaches the emergency floor", any(s.rate == 0.2 for s in during_spike)),
+        ("recovers to full settings", history[-1][2] == governor.levels[0]),
+    ]
+
+
+def scenario_cpu_overload():
+    """Cool device but a saturated CPU: shed load without giving up the target rate."""
+    source = TraceSource([55.0] * 40, [0.97] * 40)
+    governor = make_governor(source)
+    history = simulate(governor, source, 40)
+    final = history[-1][2]
+    return [
+        ("sheds load", final.rate == TARGET_RATE and final.threads == 1),
+        ("never below target rate", all(s.rate >= TARGET_RATE for _, _, s in history)),
+    ]
+
+
+def scenario_hysteresis():
+    """Temperature hovering around temp_target must not make the settings flap."""
+    temps = [71.0, 68.0] * 40
+    source = TraceSource(temps, [0.5] * len(temps))
+    history = simulate(make_governor(source), source, len(temps))
+    changes = sum(1 for a, b in zip(history, history[1:]) if a[2] != b[2])
+    levels_up = sum(
+        1 for a, b in zip(history, history[1:]) if a[2].rate < b[2].rate or a[2].scale < b[2].scale
+    )
+    return [
+        ("only steps down", levels_up == 0),
+        ("bounded number of changes", changes <= 10),
+    ]
+
+
+SCENARIOS = [
+    scenario_cool,
+    scenario_heat_soak,
+    scenario_spike_and_recover,
+    scenario_cpu_overload,
+    scenario_hysteresis,
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--verbose", action="store_true", help="Print every check.")
+    args = parser.parse_args()
+
+    failures = 0
+    for scenario in SCENARIOS:
+        checks = scenario()
+        failed = [name for name, ok in checks if not ok]
+        failures += len(failed)
+        print(f"{scenario.__name__:<30} {'FAIL' if failed else 'PASS'}")
+        for name, ok in checks:
+            if args.verbose or not ok:
+                print(f"    [{'ok' if ok else 'FAIL'}] {name}")
+
+    print(f"\n{len(SCENARIOS)} scenario(s), {failures} failed check(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+def atomic_write(path: str, data: bytes, fsync: bool = True):
+    """Writes to a temporary file and renames it over `path`, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotStore:
+    """
+    Bounded directory of snapshot files with an in-memory index.
+
+    The directory is scanned once at startup; afterwards the index (an OrderedDict in
+    oldest-first order) tracks every file, so each save evicts in O(1) without listing or
+    stat-ing the directory. Both a file count and a total byte quota are enforced.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_count: int = 50,
+        max_bytes: int = 0,
+        suffix: str = ".jpg",
+        fsync: bool = True,
+    ):
+        """
+        Args:
+            directory (str): Where snapshots are stored; created if missing.
+            max_count (int): Maximum number of snapshots kept.
+            max_bytes (int): Maximum total size in bytes; 0 disables the byte quota.
+            suffix (str): Only files with this suffix belong to the store.
+            fsync (bool): Flush each snapshot to the SD card before it becomes visible.
+        """
+        self.directory = directory
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+        self.index = OrderedDict()  # key: path, value: size in bytes (oldest first)
+        self.bytes = 0
+        self.evicted = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._rebuild()
+
+    def _rebuild(self):
+        """One directory scan at startup, oldest first; also clears interrupted writes."""
+        found = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    os.remove(entry.path)  # Left behind by a crash mid-write.
+                elif entry.name.endswith(self.suffix) and entry.is_file():
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(found):
+            self.index[path] = size
+            self.bytes += size
+        with self.lock:
+            self._evict()
+
+    def save(self, name: str, data: bytes) -> str:
+        """
+        Atomically writes one snapshot and evicts the oldest ones beyond the quotas.
+
+        Returns:
+            str: Path of the stored snapshot.
+        """
+        path = os.path.join(self.directory, name)
+        atomic_write(path, data, self.fsync)
+        with self.lock:
+            previous = self.index.pop(path, None)  # Same name saved twice (same second).
+            if previous is not None:
+                self.bytes -= previous
+            self.index[path] = len(data)
+            self.bytes += len(data)
+            self._evict()
+        return path
+
+    def _evict(self):
+        """Drops the oldest snapshots until both quotas hold. Caller holds the lock."""
+        while len(self.index) > self.max_count or (
+            self.max_bytes and self.bytes > self.max_bytes and len(self.index) > 1
+        ):
+            path, size = self.index.popitem(last=False)
+            self.bytes -= size
+            self.evicted += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not delete {path}. {e}")
+
+    def entries(self) -> list:
+        """Returns (name, path) for every stored snapshot, oldest first."""
+        with self.lock:
+            return [(os.path.basename(path), path) for path in self.index]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"count": len(self.index), "bytes": self.bytes, "evicted": self.evicted}
+
+
+# Fixed trailer at the end of every slot file: magic, sequence, JPEG length, CRC-32 of the
+# JPEG bytes, capture time and the snapshot's original name.
+SLOT_TRAILER = struct.Struct(">4sQIId64s")
+SLOT_MAGIC = b"SNP1"
+
+
+class SlotSnapshotStore:
+    """
+    Snapshot ring of preallocated, fixed-size slot files, for SD cards.
+
+    `max_count` files of `slot_size` bytes are allocated once and then overwritten in
+    place in ring order, so saving never creates, grows or deletes a file and the card's
+    filesystem metadata stays untouched. Each slot starts with the JPEG (decoders stop at
+    its end-of-image marker, so the files stay viewable) and ends with a trailer holding
+    the length, CRC and name. The trailer is written after the JPEG, so a save interrupted
+    by a power cut leaves a CRC mismatch and the slot is ignored at the next startup.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_count: int = 50,
+        slot_size: int = 512 * 1024,
+        fsync: bool = True,
+    ):
+        """
+        Args:
+            directory (str): Where the slot files live; created if missing.
+            max_count (int): Number of slots.
+            slot_size (int): Size of each slot file in bytes, trailer included.
+            fsync (bool): Flush each save to the SD card before it is indexed.
+        """
+        self.directory = directory
+        self.max_count = max_count
+        self.slot_size = slot_size
+        self.capacity = slot_size - SLOT_TRAILER.size
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+        self.slots = [None] * max_count  # (seq, name, length) per slot, None if empty.
+        self.seq = 0
+        self.next_slot = 0
+        self.rejected = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._rebuild()
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.directory, f"slot_{slot:03d}.jpg")
+
+    def _rebuild(self):
+        """Preallocates missing slots and reads back every valid trailer, once."""
+        for slot in range(self.max_count):
+            path = self.slot_path(slot)
+            if not os.path.exists(path) or os.path.getsize(path) != self.slot_size:
+                with open(path, "wb") as f:
+                    if hasattr(os, "posix_fallocate"):
+                        os.posix_fallocate(f.fileno(), 0, self.slot_size)
+                    else:
+                        f.truncate(self.slot_size)
+                continue
+            self.slots[slot] = self._read_trailer(path)
+
+        valid = [(entry[0], slot) for slot, entry in enumerate(self.slots) if entry]
+        self.seq = max((seq for seq, _ in valid), default=0)
+        empty = [slot for slot, entry in enumerate(self.slots) if entry is None]
+        # Fill empty slots first, then overwrite the oldest; from there on it is a ring.
+        self.next_slot = empty[0] if empty else min(valid)[1]
+
+    def _read_trailer(self, path: str):
+        with open(path, "rb") as f:
+            f.seek(self.capacity)
+            magic, seq, length, crc, _, name = SLOT_TRAILER.unpack(f.read(SLOT_TRAILER.size))
+            if magic != SLOT_MAGIC or length > self.capacity:
+                return None
+            f.seek(0)
+            if zlib.crc32(f.read(length)) != crc:
+                return None  # Torn write.
+        return seq, name.rstrip(b"\0").decode("utf-8", "replace"), length
+
+    def save(self, name: str, data: bytes):
+        """
+        Overwrites the oldest slot with one snapshot.
+
+        Returns:
+            str | None: Path of the slot file, or None if the snapshot exceeds the slot size.
+        """
+        if len(data) > self.capacity:
+            self.rejected += 1
+            print(f"Warning: Snapshot {name} ({len(data)} B) exceeds the {self.capacity} B slot. Not saved.")
+            return None
+
+        with self.lock:
+            slot = self.next_slot
+            self.next_slot = (slot + 1) % self.max_count
+            self.seq += 1
+            path = self.slot_path(slot)
+            trailer = SLOT_TRAILER.pack(
+                SLOT_MAGIC,
+                self.seq,
+                len(data),
+                zlib.crc32(data),
+                time.time(),
+                name.encode("utf-8")[:64],
+            )
+            with open(path, "r+b") as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                f.seek(self.capacity)
+                f.write(trailer)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.slots[slot] = (self.seq, name, len(data))
+        return path
+
+    def entries(self) -> list:
+        """Returns (name, path) for every stored snapshot, oldest first."""
+        with self.lock:
+            used = sorted((entry[0], slot, entry[1]) for slot, entry in enumerate(self.slots) if entry)
+        return [(name, self.slot_path(slot)) for _, slot, name in used]
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self.slots if entry)
+
+    def stats(self) -> dict:
+        with self.lock:
+            used = [entry for entry in self.slots if entry]
+            return {
+                "count": len(used),
+                "bytes": sum(entry[2] for entry in used),
+                "rejected": self.rejected,
+            }
+
+
+def open_snapshot_store(directory: str, max_count: int, max_bytes: int = 0, slots: bool = False):
+    """
+    Builds the snapshot store configured for an edge script.
+
+    Args:
+        directory (str): Snapshot directory.
+        max_count (int): Maximum number of snapshots kept.
+        max_bytes (int): Total byte quota; 0 disables it. With slots, it is split evenly
+            into fixed-size slot files (default 512 KiB per slot when 0).
+        slots (bool): Use the preallocated fixed-slot layout instead of one file per snapshot.
+
+    Returns:
+        SnapshotStore | SlotSnapshotStore: Both expose save(), entries() and stats().
+    """
+    if slots:
+        slot_size = max_bytes // max_count if max_bytes else 512 * 1024
+        # A subdirectory, so switching layouts never mixes slot files with plain snapshots.
+        return SlotSnapshotStore(
+            os.path.join(directory, "slots"), max_count=max_count, slot_size=slot_size
+        )
+    return SnapshotStore(directory, max_count=max_count, max_bytes=max_bytes)
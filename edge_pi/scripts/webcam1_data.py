@@ -4,6 +4,7 @@ import os
 import cv2
 import paho.mqtt.client as mqtt
 from datetime import datetime
+from snapshot_store import open_snapshot_store
 
 # ---------------- MQTT CONFIG ----------------
 BROKER_IP = "<MAIN_PI_IP>" # Replace with main Pi's IP
@@ -14,9 +15,16 @@ WAKE_COMMAND_TOPIC = "system/wake_pi"
 SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', 'snapshot')
 MAX_SNAPSHOTS = 50                   # Keep only the last 50 snapshots
 CAPTURE_INTERVAL = 2                  # Seconds between snapshots
+SNAPSHOT_MAX_MB = float(os.environ.get("SNAPSHOT_MAX_MB", 0))  # 0 = count quota only
+SNAPSHOT_SLOTS = os.environ.get("SNAPSHOT_SLOTS", "0") == "1"  # Preallocated slot files
 
-# Ensure snapshot directory exists
-os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+# Scans the snapshot directory once; every later save evicts from the in-memory index
+snapshot_store = open_snapshot_store(
+    SNAPSHOT_DIR,
+    MAX_SNAPSHOTS,
+    max_bytes=int(SNAPSHOT_MAX_MB * 1024 * 1024),
+    slots=SNAPSHOT_SLOTS,
+)
 
 # ---------------- GLOBAL STATE ----------------
 capture_active = False  # Flag to control continuous capture
@@ -65,21 +73,13 @@ def continuous_capture():
                 # Timestamped filename
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"cam1_snapshot_{timestamp}.jpg"
-                filepath = os.path.join(SNAPSHOT_DIR, filename)
-
-                # Save snapshot
-                cv2.imwrite(filepath, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                print(f"📷 Snapshot saved as {filepath}")
-
-                # Manage snapshots folder
-                snapshots = sorted(
-                    [f for f in os.listdir(SNAPSHOT_DIR) if f.endswith(".jpg")],
-                    key=lambda x: os.path.getmtime(os.path.join(SNAPSHOT_DIR, x))
-                )
-                while len(snapshots) > MAX_SNAPSHOTS:
-                    oldest = snapshots.pop(0)
-                    os.remove(os.path.join(SNAPSHOT_DIR, oldest))
-                    print(f"🗑 Deleted oldest snapshot: {oldest}")
+
+                # Save snapshot (atomic write; the store drops the oldest beyond its quotas)
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+                if ok:
+                    filepath = snapshot_store.save(filename, buffer.tobytes())
+                    if filepath:
+                        print(f"📷 Snapshot saved as {filepath}")
 
             time.sleep(CAPTURE_INTERVAL)
 
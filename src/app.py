@@ -12,16 +12,34 @@ from flask import (
     url_for,
     send_from_directory,
     Response,
+    request,
 )
+import threading
 import time
 import cv2
-import threading
 import face_recognition
 import hashlib
 from collections import OrderedDict
 
+from batcher import MicroBatcher
 from db import Database
+from detection_feed import ALL_CAMERAS, DetectionFeed
+from frame_envelope import decode_frame, is_binary_frame
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    EDGE_STAGE_LATENCY,
+    EVIDENCE_DEPTH,
+    FRAMES,
+    INGEST_DEPTH,
+    INGEST_DROPPED,
+    MQTT_MESSAGES,
+    REGISTRY,
+    STAGE_LATENCY,
+)
+from ingest import DetectionWorkerPool, IngestQueue, DROP_OLDEST
 from entities.camera import Camera
+from evidence_writer import EvidenceWriter
+from event_stream import EventBroker
 from entities.camera_manager import CameraManager
 from yolo_model import Detector
 
@@ -29,7 +47,9 @@ from yolo_model import Detector
 # Directory Configuration
 # -------------------------
 # Define and create the non-compliance evidence directory
-NON_COMPLIANCE_DIR = os.path.join(os.path.dirname(__file__), "non_compliance")
+NON_COMPLIANCE_DIR = os.environ.get(
+    "NON_COMPLIANCE_DIR", os.path.join(os.path.dirname(__file__), "non_compliance")
+)
 os.makedirs(NON_COMPLIANCE_DIR, exist_ok=True)
 
 # Directory to save known faces
@@ -43,10 +63,70 @@ os.makedirs(KNOWN_FACES_DIR, exist_ok=True)
 RECENT_MESSAGES_CACHE = OrderedDict()
 MAX_CACHE_SIZE = 100  # Number of recent messages to track.
 
+# -------------------------
+# Ingest Queue Configuration
+# -------------------------
+# Frames are parsed on the MQTT thread and processed by a pool of detection workers.
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 32))
+INGEST_MAX_PER_CAMERA = int(os.environ.get("INGEST_MAX_PER_CAMERA", 4))
+# "drop_oldest" or "keep_latest" (only the newest frame per camera is kept).
+INGEST_DROP_POLICY = os.environ.get("INGEST_DROP_POLICY", DROP_OLDEST)
+DETECTION_WORKERS = int(os.environ.get("DETECTION_WORKERS", 4))
+
+# Frames arriving from different cameras within the deadline share one YOLO pass.
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", DETECTION_WORKERS))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 20))
+
+# -------------------------
+# Evidence Writer Configuration
+# -------------------------
+EVIDENCE_QUEUE_SIZE = int(os.environ.get("EVIDENCE_QUEUE_SIZE", 64))
+EVIDENCE_BATCH_SIZE = int(os.environ.get("EVIDENCE_BATCH_SIZE", 32))
+EVIDENCE_FLUSH_INTERVAL = float(os.environ.get("EVIDENCE_FLUSH_INTERVAL", 0.5))
+# JPEG quality of saved evidence. 95 is cv2.imwrite's default, the quality evidence was
+# always stored at; lower it to trade image detail for disk space and write time.
+EVIDENCE_JPEG_QUALITY = int(os.environ.get("EVIDENCE_JPEG_QUALITY", 95))
+
+# -------------------------
+# Detection Feed Configuration
+# -------------------------
+# Upper bound on the frame rate sent to each viewer of /detection_feed.
+DETECTION_FEED_MAX_FPS = float(os.environ.get("DETECTION_FEED_MAX_FPS", 5))
+
+# -------------------------
+# Server-Sent Events Configuration
+# -------------------------
+# Number of recent events kept so reconnecting dashboards can resume via Last-Event-ID.
+SSE_REPLAY_SIZE = int(os.environ.get("SSE_REPLAY_SIZE", 1000))
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", 15))
+
 # -------------------------
 # Initialize YOLO Detector
 # -------------------------
-detector = Detector()
+# Benchmark with `python src/inference_backends.py`, then pick a backend (or "auto").
+YOLO_BACKEND = os.environ.get("YOLO_BACKEND", "pytorch")
+YOLO_THREADS = int(os.environ["YOLO_THREADS"]) if "YOLO_THREADS" in os.environ else None
+
+# Two-stage cascade: set YOLO_CASCADE_WEIGHTS=models/yolo26m.pt to escalate ambiguous frames.
+YOLO_CASCADE_WEIGHTS = os.environ.get("YOLO_CASCADE_WEIGHTS")
+YOLO_CASCADE_LOW = float(os.environ.get("YOLO_CASCADE_LOW", 0.25))
+YOLO_CASCADE_HIGH = float(os.environ.get("YOLO_CASCADE_HIGH", 0.6))
+
+# Instantiate the database wrapper for local use in this module.
+# The schema (and any pending migration) must exist before the face recogniser loads it.
+db = Database()
+db.init_db()
+
+detector = Detector(
+    backend=YOLO_BACKEND,
+    threads=YOLO_THREADS,
+    cascade_weights=YOLO_CASCADE_WEIGHTS,
+    cascade_band=(YOLO_CASCADE_LOW, YOLO_CASCADE_HIGH),
+)
+batcher = MicroBatcher(
+    detector, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS
+)
+batcher.start()
 
 # Create the Flask application instance.
 app = Flask(__name__)
@@ -74,6 +154,23 @@ LATEST_DETECTION = {
 
 EVENT_LOGS = []  # Will later be persisted to disk or database.
 
+# Detection workers and the MQTT thread write SYSTEM_STATUS and LATEST_DETECTION while
+# request threads read them; every access goes through this lock.
+STATE_LOCK = threading.Lock()
+
+# Pushes detection, status and event updates to dashboards over /api/stream.
+event_broker = EventBroker(replay_size=SSE_REPLAY_SIZE, heartbeat=SSE_HEARTBEAT)
+
+
+def update_status(**changes):
+    """Applies changes to SYSTEM_STATUS and pushes a "status" event if anything changed."""
+    with STATE_LOCK:
+        if all(SYSTEM_STATUS.get(key) == value for key, value in changes.items()):
+            return
+        SYSTEM_STATUS.update(changes)
+        # Published under the lock so status events leave in the order they were applied.
+        event_broker.publish("status", dict(SYSTEM_STATUS))
+
 # -------------------------
 # MQTT Test Integration
 # -------------------------
@@ -90,14 +187,23 @@ def on_connect(client, userdata, flags, reason_code, properties):
         print(f"[MQTT] Successfully connected to broker at {MQTT_BROKER}")
         # Explicitly request Qos 1 to prevent broker delivery downgrades
         client.subscribe(MQTT_TOPIC, qos=1)
-        SYSTEM_STATUS["mqtt_connected"] = True
+        update_status(mqtt_connected=True)
         print(f"[MQTT] Subscribed to topic: {MQTT_TOPIC} with QoS 1")
     else:
         print(f"[MQTT] Connection failed with code {reason_code}")
 
 
+def on_disconnect(client, userdata, flags, reason_code, properties):
+    """Callback for broker disconnection; paho reconnects automatically."""
+    print(f"[MQTT] Disconnected from broker with code {reason_code}")
+    update_status(mqtt_connected=False)
+
+
 def on_message(client, userdata, msg):
-    """Callback for receiving and parsing the payload."""
+    """
+    Ingest stage: deduplicates and parses the payload, then hands it to the detection workers.
+    Runs on paho's network thread, so nothing heavy may happen here.
+    """
     try:
         # Start master timer the millisecond the packet is intercepted
         t_start = time.perf_counter()
@@ -110,6 +216,7 @@ def on_message(client, userdata, msg):
             print(
                 f"[MQTT] Duplicate QoS 1 message intercepted (Hash: {payload_hash[:8]}). Discarding."
             )
+            MQTT_MESSAGES.labels("duplicate").inc()
             return
 
         # Register the new hash and enforce the cache limit.
@@ -118,110 +225,192 @@ def on_message(client, userdata, msg):
             # Remove the oldest entry (FIFO)
             RECENT_MESSAGES_CACHE.popitem(last=False)
 
-        payload_str = msg.payload.decode("utf-8")
-        data = json.loads(payload_str)
+        if is_binary_frame(msg.payload):
+            # Binary envelope: the image stays a zero-copy view into the MQTT payload.
+            data, image = decode_frame(msg.payload)
+        else:
+            # Legacy base64-in-JSON format, still accepted during the rollout.
+            payload_str = msg.payload.decode("utf-8")
+            data = json.loads(payload_str)
+            image = data.get("image", "")
+
+            # Verify the base64 string is present and not a placeholder.
+            if not image or image.startswith("<"):
+                print(
+                    "[MQTT] Warning: Payload did not contain a valid base64 image string."
+                )
+                MQTT_MESSAGES.labels("malformed").inc()
+                return
 
         # Extract all necessary metadata for the database.
-        camera_id = data.get("camera_id", "unknown_edge")
-        location = data.get("location", "sit")
-        lab_id = data.get("lab_id", "unknown_lab")
-        confidence = data.get("confidence", 0.0)
-        timestamp = data.get("timestamp", time.strftime("%Y%m%d_%H%M%S"))
-        b64_image = data.get("image", "")
-
-        print(f"[MQTT] Payload received from {camera_id}. Confidence: {confidence}%")
-
-        # Verify the base64 string is present and not a placeholder.
-        if b64_image and not b64_image.startswith("<"):
-            # Decode the base64 string to binary.
-            image_bytes = base64.b64decode(b64_image)
-
-            # Conver the binary array to an OpenCV matrix
-            np_arr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-
-            # --- Phase 1: Ingestion & Decoding Timer ---
-            t_decode = time.perf_counter()
-
-            if img is not None:
-                # 1. Pass matrix to the combined YOLO/Face pipeline.
-                # This returns the frame ALREADY annotated with YOLO boxes and Face Recognition names.
-                results, annotated_frame, face_results = detector.detect_frame(img)
-
-                # --- Phase 2: AI Validation Timer ---
-                t_ai = time.perf_counter()
-
-                # Guard clause: Drop the frame to save disk space if no human is present.
-                if face_results == "NO_PERSON":
-                    print("[VISION] YOLO detected no personnel. Discarding frame.")
-                    # Print partial profiling before returning
-                    print(f"--- Node 3 Profiling (Rejected) ---")
-                    print(f"Ingestion & Decode: {(t_decode - t_start) * 1000:.1f} ms")
-                    print(f"YOLO Validation: {(t_ai - t_decode) * 1000:.1f} ms")
-                    print(f"-------------------------------------\n")
-                    return
-
-                # Update API State for testing only after confirming a person is present.
-                LATEST_DETECTION["source"] = camera_id
-                LATEST_DETECTION["confidence"] = confidence
-                LATEST_DETECTION["timestamp"] = timestamp
-                LATEST_DETECTION["human_detected"] = True
-
-                if annotated_frame is not None:
-                    # 2. Update the global frame for the Flask dashboard stream.
-                    global latest_frame
-                    # Acquire the lock before modifying the variable.
-                    with frame_lock:
-                        latest_frame = annotated_frame
-
-                    # 3. Save only the annotated frame as evidence.
-                    filename = f"incident_{camera_id}_{timestamp}.jpg"
-                    filepath = os.path.join(NON_COMPLIANCE_DIR, filename)
-                    cv2.imwrite(filepath, annotated_frame)
-
-                    # Insert the metadata and filename pointer into SQLite.
-                    db.insert_snapshot(
-                        camera_id=camera_id,
-                        location=location,
-                        lab_id=lab_id,
-                        timestamp=timestamp,
-                        confidence=confidence,
-                        filename=filename,
-                    )
-
-                    # --- Phase 3: I/O & Database Timer ---
-                    t_db = time.perf_counter()
-
-                    print(f"[DB] Logged incident {filename} to database.")
-
-                    # Print full profiling for a validated intrusion
-                    print(f"--- Node 3 Profiling (Validated) ---")
-                    print(f"Ingestion & Decode: {(t_decode - t_start) * 1000:.1f} ms")
-                    print(f"YOLO + Face AI: {(t_ai - t_decode) * 1000:.1f} ms")
-                    print(f"File & DB I/O: {(t_db - t_ai) * 1000:.1f} ms")
-                    print(f"Total Processing: {(t_db - t_start) * 1000:.1f} ms")
-                    print(f"--------------------------------------------------\n")
-
-                else:
-                    print(f"[MQTT] Warning: YOLO returned an empty frame.")
-
-            else:
-                print("[MQTT] Error: cv2 failed to decode the image matrix.")
-        else:
-            print(
-                "[MQTT] Warning: Payload did not contain a valid base64 image string."
-            )
+        job = {
+            "camera_id": data.get("camera_id", "unknown_edge"),
+            "location": data.get("location", "sit"),
+            "lab_id": data.get("lab_id", "unknown_lab"),
+            "confidence": data.get("confidence", 0.0),
+            "timestamp": data.get("timestamp", time.strftime("%Y%m%d_%H%M%S")),
+            "payload_hash": payload_hash,
+            "image": image,
+            "t_start": t_start,
+        }
+
+        print(
+            f"[MQTT] Payload received from {job['camera_id']}. Confidence: {job['confidence']}%"
+        )
+
+        if len(job["image"]) == 0:
+            print("[MQTT] Warning: Payload did not contain any image bytes.")
+            MQTT_MESSAGES.labels("malformed").inc()
+            return
+
+        # Stage timings measured on the edge node, in milliseconds (optional field).
+        for stage, ms in (data.get("timings") or {}).items():
+            if isinstance(ms, (int, float)):
+                EDGE_STAGE_LATENCY.labels(stage, job["camera_id"]).observe(ms / 1000.0)
+
+        MQTT_MESSAGES.labels("accepted").inc()
+        if not ingest_queue.put(job["camera_id"], job):
+            print("[MQTT] Warning: Ingest queue is closed. Discarding frame.")
 
     except json.JSONDecodeError:
         print("[MQTT] Error: Received malformed JSON payload.")
+        MQTT_MESSAGES.labels("malformed").inc()
+    except ValueError as e:
+        print(f"[MQTT] Error: Received malformed frame envelope. {e}")
+        MQTT_MESSAGES.labels("malformed").inc()
     except Exception as e:
         print(f"[MQTT] Unexpected error during message processing: {e}")
+        MQTT_MESSAGES.labels("error").inc()
+
+
+def process_frame(job, queue_wait):
+    """
+    Detection stage: decodes the image, runs the YOLO/Face pipeline and persists the evidence.
+    Executed by the DetectionWorkerPool threads, never by the MQTT thread.
+    """
+    t_start = job["t_start"]
+    camera_id = job["camera_id"]
+    timestamp = job["timestamp"]
+    confidence = job["confidence"]
+    STAGE_LATENCY.labels("queue_wait", camera_id).observe(queue_wait)
+    t_dequeue = time.perf_counter()
+
+    image_bytes = job["image"]
+    if isinstance(image_bytes, str):
+        # Legacy payload: decode the base64 string to binary.
+        image_bytes = base64.b64decode(image_bytes)
+
+    # Conver the binary array to an OpenCV matrix (no copy for binary envelopes).
+    np_arr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+
+    STAGE_LATENCY.labels("decode", camera_id).observe(time.perf_counter() - t_dequeue)
+
+    if img is None:
+        print("[MQTT] Error: cv2 failed to decode the image matrix.")
+        FRAMES.labels(camera_id, "decode_error").inc()
+        return
+
+    # 1. Pass matrix to the combined YOLO/Face pipeline.
+    # This returns the frame ALREADY annotated with YOLO boxes and Face Recognition names.
+    # The micro-batcher shares the YOLO pass with frames from other cameras
+    # and records the "preprocess", "batch_wait", "yolo" and "face" stage latencies.
+    results, annotated_frame, face_results = batcher.detect(img, camera_id=camera_id)
+
+    # Guard clause: Drop the frame to save disk space if no human is present.
+    if face_results == "NO_PERSON":
+        print("[VISION] YOLO detected no personnel. Discarding frame.")
+        FRAMES.labels(camera_id, "no_person").inc()
+        STAGE_LATENCY.labels("end_to_end", camera_id).observe(
+            time.perf_counter() - t_start
+        )
+        return
+
+    # Update API State for testing only after confirming a person is present.
+    with STATE_LOCK:
+        LATEST_DETECTION["source"] = camera_id
+        LATEST_DETECTION["confidence"] = confidence
+        LATEST_DETECTION["timestamp"] = timestamp
+        LATEST_DETECTION["human_detected"] = True
+        event_broker.publish("detection", dict(LATEST_DETECTION))
+    update_status(last_alert=timestamp)
+
+    if annotated_frame is None:
+        print(f"[MQTT] Warning: YOLO returned an empty frame.")
+        return
+
+    # 2. Publish the annotated frame to the live detection feed (O(1), never waits on viewers).
+    detection_feed.publish(camera_id, annotated_frame)
+
+    # 3. Hand the annotated frame and its metadata to the background evidence writer,
+    # which saves the JPEG and batches the SQLite insert off the detection path.
+    # Edge timestamps may have one-second resolution; the payload hash (unique among
+    # recent payloads, see the dedup cache) keeps same-second incidents apart.
+    filename = f"incident_{camera_id}_{timestamp}_{job['payload_hash'][:8]}.jpg"
+    evidence_writer.submit(
+        annotated_frame,
+        {
+            "camera_id": camera_id,
+            "location": job["location"],
+            "lab_id": job["lab_id"],
+            "timestamp": timestamp,
+            "confidence": confidence,
+            "filename": filename,
+        },
+    )
+
+    # End-to-end: from MQTT receipt to evidence hand-off ("file_io" and "db" follow async).
+    FRAMES.labels(camera_id, "validated").inc()
+    STAGE_LATENCY.labels("end_to_end", camera_id).observe(time.perf_counter() - t_start)
 
 
+# Annotated detection frames, streamed to the dashboard per camera.
+detection_feed = DetectionFeed(max_fps=DETECTION_FEED_MAX_FPS)
+
+# Background persistence stage: evidence files and batched snapshot inserts.
+evidence_writer = EvidenceWriter(
+    db,
+    NON_COMPLIANCE_DIR,
+    max_queue=EVIDENCE_QUEUE_SIZE,
+    batch_size=EVIDENCE_BATCH_SIZE,
+    flush_interval=EVIDENCE_FLUSH_INTERVAL,
+    jpeg_quality=EVIDENCE_JPEG_QUALITY,
+    # Dashboards learn about a new event only once its row is committed.
+    on_commit=lambda event: event_broker.publish("event", event),
+)
+evidence_writer.start()
+
+# Initialise the detection worker pool before MQTT starts delivering frames.
+ingest_queue = IngestQueue(
+    max_size=INGEST_QUEUE_SIZE,
+    max_per_camera=INGEST_MAX_PER_CAMERA,
+    drop_policy=INGEST_DROP_POLICY,
+)
+detection_pool = DetectionWorkerPool(
+    ingest_queue, process_frame, num_workers=DETECTION_WORKERS
+)
+detection_pool.start()
+
+# Queue depths and drop counters are read from their owners at scrape time.
+INGEST_DEPTH.set_function(
+    lambda: {
+        (camera_id,): info["depth"]
+        for camera_id, info in ingest_queue.stats()["per_camera"].items()
+    }
+)
+INGEST_DROPPED.set_function(
+    lambda: {
+        (camera_id,): info["dropped"]
+        for camera_id, info in ingest_queue.stats()["per_camera"].items()
+    }
+)
+EVIDENCE_DEPTH.set_function(lambda: evidence_writer.queue.qsize())
+
 # Initialise MQTT Thread
 mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
 mqtt_client.username_pw_set(MQTT_USER, MQTT_PASS)
 mqtt_client.on_connect = on_connect
+mqtt_client.on_disconnect = on_disconnect
 mqtt_client.on_message = on_message
 
 print("[SYSTEM] Starting MQTT validation thread...")
@@ -234,15 +423,8 @@ mqtt_client.loop_start()
 cm = CameraManager()
 cm.add_camera("cam1", source="/dev/video0")  # Use local webcam as "cam1"
 
-# Instantiate the database wrapper for local use in this module.
-db = Database()
-
-# Initialise the thread lock globally.
-frame_lock = threading.Lock()
-latest_frame = None
-
-registration_lock = threading.Lock()
-registration_frame = None  # For local face registration.
+# Face registration uses the latest frame captured by the local camera.
+REGISTRATION_CAMERA_ID = "cam1"
 
 
 # -------------------------
@@ -276,21 +458,20 @@ def capture_face(name):
     Captures the current local frame, locates the face, extracts the 128-d embedding,
     and stores it securely in the SQLite database.
     """
-    global registration_frame
-
-    # Safely acquire the current local frame using the correct lock
-    with registration_lock:
-        if registration_frame is None:
-            return (
-                jsonify(
-                    {
-                        "status": "error",
-                        "message": "No frame available from local camera.",
-                    }
-                ),
-                400,
-            )
-        current_frame = registration_frame.copy()
+    # Grab the newest decoded frame from the camera's ring buffer (no JPEG round trip).
+    # This also wakes the camera if capture was suspended for lack of viewers.
+    latest = cm.get_camera(REGISTRATION_CAMERA_ID).wait_for_frame(0, timeout=3.0)
+    if latest is None:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "No frame available from local camera.",
+                }
+            ),
+            400,
+        )
+    current_frame = latest[2].copy()
 
     # Optional: convert name to lowercase.
     name = name.strip().lower()
@@ -329,15 +510,12 @@ def capture_face(name):
     face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
     encoding_array = face_encodings[0]
 
-    # Convert the NumPy array to a standard Python list for JSON serialisation.
-    encoding_list = encoding_array.tolist()
-
-    # Save to database
-    success = db.upsert_authorised_face(name, encoding_list)
+    # Save to database as a packed float32 BLOB.
+    success = db.upsert_authorised_face(name, encoding_array)
 
     if success:
-        # Trigger the dynamic reload so the edge device immediately recognises the new face
-        detector.face_recogniser.reload_database()
+        # Patch the live index so the edge device immediately recognises the new face
+        detector.face_recogniser.add_or_update(name, encoding_array)
         return jsonify(
             {
                 "status": "ok",
@@ -356,45 +534,86 @@ def capture_face(name):
         )
 
 
-def generate_frames():
+@app.route("/api/faces/<name>", methods=["DELETE"])
+def delete_face(name):
     """
-    Generator function that continuously yields the latest camera frame
-    from the local webcam for the registration interface.
+    Revokes an authorised person by removing their embedding from the database
+    and from the live face index.
     """
-    global registration_frame
-
-    while True:
-        # Fetch the JPEG bytes directly from CameraManager.
-        frame_bytes = cm.get_frame("cam1")
+    name = name.strip().lower()
 
-        if frame_bytes is None:
-            time.sleep(0.1)
-            continue
+    if not db.delete_authorised_face(name):
+        return (
+            jsonify({"status": "error", "message": f"No registered face named '{name}'."}),
+            404,
+        )
 
-        # Decode the JPEG bytes back into an OpenCV matrix for the registration endpoint
-        np_arr = np.frombuffer(frame_bytes, np.uint8)
-        frame_matrix = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+    detector.face_recogniser.remove(name)
+    return jsonify({"status": "ok", "message": f"Removed '{name}' from the database."})
 
-        # Safely update the global registration frame.
-        with registration_lock:
-            registration_frame = frame_matrix
 
-        # Yield the bytes directly in the standard MJPEG format.
-        yield (
-            b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
-        )
+def generate_frames(camera_id: str):
+    """
+    Generator function that yields every new frame of a local camera as MJPEG.
+    Frames are encoded once by the camera's shared broadcaster, whatever the number of viewers.
+    """
+    broadcaster = cm.get_broadcaster(camera_id)
+    broadcaster.subscribe()
+    try:
+        seq = 0
+        while True:
+            # Sleep on the broadcaster's condition variable until a newer frame exists.
+            item = broadcaster.wait_for_frame(seq, timeout=1.0)
+            if item is None:
+                continue
+            seq, frame_bytes = item
+
+            # Yield the bytes directly in the standard MJPEG format.
+            yield (
+                b"--frame\r\n"
+                b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
+            )
+    finally:
+        # Runs when the client disconnects and Flask closes the generator.
+        broadcaster.unsubscribe()
 
 
 @app.route("/video_feed")
-def video_feed():
+@app.route("/video_feed/<camera_id>")
+def video_feed(camera_id: str = REGISTRATION_CAMERA_ID):
     """
     Endpoint that serves the live video stream to the frontend HTML <img> tags.
     """
+    if cm.get_broadcaster(camera_id) is None:
+        return jsonify({"status": "error", "message": f"Unknown camera '{camera_id}'."}), 404
+
     return Response(
-        generate_frames(), mimetype="multipart/x-mixed-replace; boundary=frame"
+        generate_frames(camera_id), mimetype="multipart/x-mixed-replace; boundary=frame"
     )
 
 
+@app.route("/detection_feed")
+@app.route("/detection_feed/<camera_id>")
+def detection_feed_stream(camera_id: str = ALL_CAMERAS):
+    """
+    Serves the annotated YOLO/face detection frames of one edge camera as MJPEG.
+    Without a camera_id, the newest detection from any camera is shown.
+    An optional ?fps= query parameter lowers the per-client frame rate.
+    """
+    try:
+        fps = min(float(request.args.get("fps", DETECTION_FEED_MAX_FPS)), DETECTION_FEED_MAX_FPS)
+    except ValueError:
+        return jsonify({"status": "error", "message": "fps must be a number."}), 400
+    if fps <= 0:
+        return jsonify({"status": "error", "message": "fps must be positive."}), 400
+
+    def generate():
+        for jpeg in detection_feed.stream(camera_id, max_fps=fps):
+            yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+
+    return Response(generate(), mimetype="multipart/x-mixed-replace; boundary=frame")
+
+
 @app.route("/api/health", methods=["GET"])
 def health():
     """
@@ -417,7 +636,57 @@ def system_status():
     """
     Returns current system connectivity and sensor status.
     """
-    return jsonify(SYSTEM_STATUS)
+    with STATE_LOCK:
+        status = dict(SYSTEM_STATUS)
+    return jsonify(status)
+
+
+@app.route("/api/stream", methods=["GET"])
+def event_stream():
+    """
+    Server-Sent Events channel replacing polling of /api/detection/latest, /api/status
+    and /api/events.
+
+    Event types:
+        detection: the LATEST_DETECTION payload after a validated detection.
+        status: the full SYSTEM_STATUS after any change.
+        event: a snapshots row (as in /api/events) once it is committed.
+        reset: the requested Last-Event-ID can no longer be replayed; refetch state.
+
+    A reconnecting EventSource sends the Last-Event-ID header automatically; clients that
+    cannot set headers may pass ?last_event_id= instead.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "last_event_id"
+    )
+    return Response(
+        event_broker.stream(last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms, frame counters and queue gauges.
+    """
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route("/api/ingest", methods=["GET"])
+def ingest_stats():
+    """
+    Returns ingest queue depth and drop counters to monitor backpressure.
+    """
+    stats = ingest_queue.stats()
+    stats["batching"] = batcher.stats()
+    stats["face_encodings"] = detector.face_recogniser.encodings_computed
+    stats["cascade"] = detector.get_cascade_stats()
+    stats["evidence"] = evidence_writer.stats()
+    stats["detection_feed"] = detection_feed.stats()
+    stats["event_stream"] = event_broker.stats()
+    return jsonify(stats)
 
 
 @app.route("/api/detection/latest", methods=["GET"])
@@ -425,21 +694,45 @@ def latest_detection():
     """
     Returns the most recent detection result.
     """
-    return jsonify(LATEST_DETECTION)
+    with STATE_LOCK:
+        detection = dict(LATEST_DETECTION)
+    return jsonify(detection)
 
 
 @app.route("/api/events", methods=["GET"])
 def event_logs():
     """
     Returns historical event logs fetched directly from the SQLite database.
+
+    Query parameters (all optional):
+        limit: page size (default 50, max 500).
+        cursor: `next_cursor` from the previous response, to page further back.
+        camera_id, lab_id, location: exact-match filters.
+        since, until: inclusive created_at bounds, "YYYY-MM-DD HH:MM:SS" (UTC).
+        min_confidence: minimum edge confidence.
     """
-    # Fetch the 50 most recent events.
-    recent_events = db.get_recent_events(limit=50)
+    args = request.args
+    try:
+        limit = min(max(int(args.get("limit", 50)), 1), 500)
+        min_confidence = args.get("min_confidence")
+        events, next_cursor = db.get_events(
+            limit=limit,
+            cursor=args.get("cursor"),
+            camera_id=args.get("camera_id"),
+            lab_id=args.get("lab_id"),
+            location=args.get("location"),
+            since=args.get("since"),
+            until=args.get("until"),
+            min_confidence=float(min_confidence) if min_confidence else None,
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
     return jsonify(
         {
-            "count": len(recent_events),
-            "events": recent_events,
+            "count": len(events),
+            "events": events,
+            "next_cursor": next_cursor,
         }
     )
 
@@ -505,5 +798,12 @@ def shutdown_services():
     mqtt_client.loop_stop()
     mqtt_client.disconnect()
 
+    print("[SYSTEM] Draining detection workers...")
+    detection_pool.stop()
+    batcher.stop()
+
+    print("[SYSTEM] Flushing evidence writer...")
+    evidence_writer.stop()
+
     print("[SYSTEM] Releasing camera hardware...")
     cm.stop_all()
@@ -0,0 +1,143 @@
+# File: src/batcher.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from metrics import BATCH_SIZE, STAGE_LATENCY
+
+
+class MicroBatcher:
+    """
+    Collects frames submitted concurrently by the detection workers and runs YOLO on them
+    as one batch, waiting at most `max_wait_ms` (or until `max_batch_size` frames are queued).
+
+    Only the YOLO forward pass is batched. Preprocessing, face recognition and annotation
+    stay on the calling worker thread so they keep running in parallel.
+    """
+
+    def __init__(self, detector, max_batch_size: int = 4, max_wait_ms: float = 20.0):
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending = deque()  # (frame_small, Future) pairs; results are (yolo_result, seconds)
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # Batch statistics, exposed through stats().
+        self.batches = 0
+        self.frames = 0
+
+    def start(self):
+        """Spawns the collector thread."""
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="yolo-micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops the collector once every frame already submitted has been answered."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def detect(self, frame, annotate: bool = True, camera_id: str = None):
+        """
+        Drop-in replacement for Detector.detect_frame that shares the YOLO pass with
+        whichever other frames arrive within the batching deadline.
+        """
+        t_start = time.perf_counter()
+        frame_small = self.detector.preprocess(frame)
+        if frame_small is None:
+            return None, None, None
+        t_preprocess = time.perf_counter()
+
+        future = Future()
+        with self._cond:
+            queued = self._running
+            if queued:
+                self._pending.append((frame_small, future))
+                self._cond.notify()
+
+        if not queued:
+            # Collector is down (e.g. during shutdown); fall back to a batch of one, run
+            # outside the lock so other submitters are not held up for a whole inference.
+            t0 = time.perf_counter()
+            result = self.detector.predict_batch([frame_small])[0]
+            future.set_result((result, time.perf_counter() - t0))
+
+        # Re-raises any exception thrown by the YOLO pass in this caller's thread.
+        yolo_result, inference = future.result()
+        t_yolo = time.perf_counter()
+        output = self.detector.postprocess(
+            frame, frame_small, yolo_result, annotate, camera_id
+        )
+
+        # "batch_wait" is the time spent queued for a batch, "yolo" the forward pass of the
+        # batch this frame rode in, "face" recognition plus annotation.
+        label = camera_id or "unknown"
+        STAGE_LATENCY.labels("preprocess", label).observe(t_preprocess - t_start)
+        STAGE_LATENCY.labels("batch_wait", label).observe(
+            max(0.0, t_yolo - t_preprocess - inference)
+        )
+        STAGE_LATENCY.labels("yolo", label).observe(inference)
+        STAGE_LATENCY.labels("face", label).observe(time.perf_counter() - t_yolo)
+        return output
+
+    def _collect(self) -> list:
+        """Blocks for the first frame, then gathers more until the batch is full or the deadline hits."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or not self._running)
+            if not self._pending:
+                return []
+
+            deadline = time.perf_counter() + self.max_wait
+            while len(self._pending) < self.max_batch_size and self._running:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                batch.append(self._pending.popleft())
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                if not self._running:
+                    break
+                continue
+
+            frames_small = [frame_small for frame_small, _ in batch]
+            try:
+                t0 = time.perf_counter()
+                yolo_results = self.detector.predict_batch(frames_small)
+                inference = time.perf_counter() - t0
+                for (_, future), result in zip(batch, yolo_results):
+                    future.set_result((result, inference))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+            self.batches += 1
+            self.frames += len(batch)
+            BATCH_SIZE.observe(len(batch))
+
+    def stats(self) -> dict:
+        """Returns batching counters for monitoring."""
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "mean_batch_size": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
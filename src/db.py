@@ -1,10 +1,30 @@
 # File: src/db.py
+import os
 import sqlite3
+import base64
 import json
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+import numpy as np
+
 DB_PATH = Path(__file__).parent / "lab_monitor.db"
 
+# Per-connection tuning applied to every pooled connection.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # Readers no longer block on the ingest writer.
+    "PRAGMA synchronous=NORMAL",  # Safe with WAL; fsync only at checkpoints.
+    "PRAGMA cache_size=-16000",  # 16 MB page cache.
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads.
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Statements kept compiled per connection; the persistent pool makes this cache effective.
+CACHED_STATEMENTS = 256
+
 
 def init_db():
     """Initialize a basic SQLite database file."""
@@ -15,28 +35,81 @@ def init_db():
 
 
 class Database:
-    """Class to manage SQLite database connections, initialisation, and queries."""
+    """
+    Class to manage SQLite database connections, initialisation, and queries.
 
-    def __init__(self, db_name: str = "lab_monitor.db"):
+    Holds one persistent writer connection (serialised by a lock) and a small pool of
+    read connections, all in WAL mode, so dashboard reads do not contend with ingest writes.
+    """
+
+    def __init__(self, db_name: str = None, read_pool_size: int = 4):
+        # HUB_DB_NAME (relative to src/ or absolute) lets load tests use a scratch database.
+        db_name = db_name or os.environ.get("HUB_DB_NAME", "lab_monitor.db")
         # Resolve the absolute path to ensure reliability regardless of where the script is run from
         self.db_path = Path(__file__).parent / db_name
 
+        self._writer = None
+        self._write_lock = threading.Lock()
+
+        self.read_pool_size = read_pool_size
+        self._read_pool = queue.LifoQueue()
+        self._read_created = 0
+        self._pool_lock = threading.Lock()
+
     def connect(self):
-        """Open a connection to the SQLite database."""
-        conn = sqlite3.connect(self.db_path)
+        """Open a new tuned connection to the SQLite database."""
+        # Pooled connections are handed between threads, but only ever used by one at a time.
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=CACHED_STATEMENTS
+        )
         # Configure row_factory to return rows as dictionaries instead of plain tuples
         # This makes it much easier to convert the output directly to JSON for your Flask API
         conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
         return conn
 
+    @contextmanager
+    def writer(self):
+        """
+        Borrow the single writer connection inside a transaction.
+        Commits on success and rolls back if the block raises.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self.connect()
+            with self._writer:
+                yield self._writer
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read connection from the pool, opening one if the pool is not full yet."""
+        conn = None
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                if self._read_created < self.read_pool_size:
+                    self._read_created += 1
+                    conn = self.connect()
+            if conn is None:
+                conn = self._read_pool.get()
+
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
     def init_db(self):
         """
         Initialise the database file and construct the required tables.
         Uses 'IF NOT EXISTS' to safely execute on every system boot.
         """
         try:
-            with self.connect() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
+                # Explicit transaction so DDL and migrations apply atomically.
+                cursor.execute("BEGIN")
                 cursor.execute(
                     """
                     CREATE TABLE IF NOT EXISTS snapshots (
@@ -57,16 +130,159 @@ class Database:
                     CREATE TABLE IF NOT EXISTS authorised_faces (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         name TEXT UNIQUE NOT NULL,
-                        encoding TEXT NOT NULL,
+                        embedding BLOB NOT NULL,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                     """
                 )
-                conn.commit()
+                self._run_migrations(cursor)
                 print(f"[SYSTEM] Database schema initialised successfully.")
         except sqlite3.Error as e:
             print(f"[DB ERROR] Critical failure initialising database: {e}")
 
+    def _run_migrations(self, cursor):
+        """
+        Applies every schema migration newer than the database's PRAGMA user_version.
+        Runs inside the caller's transaction, so a failed step leaves the version untouched.
+        """
+        migrations = [
+            self._migrate_face_embeddings,  # 1
+            self._migrate_snapshot_indexes,  # 2
+            self._migrate_event_timeline_indexes,  # 3
+            self._migrate_event_covering_indexes,  # 4
+        ]
+
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        for number, migration in enumerate(migrations, start=1):
+            if number > version:
+                migration(cursor)
+                # PRAGMA does not accept bound parameters.
+                cursor.execute(f"PRAGMA user_version = {number}")
+
+    def _migrate_snapshot_indexes(self, cursor):
+        """Adds the indexes used by per-camera and per-lab timeline queries."""
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_camera_time
+            ON snapshots (camera_id, detection_timestamp)
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_lab_created
+            ON snapshots (lab_id, created_at)
+            """
+        )
+
+    def _migrate_event_timeline_indexes(self, cursor):
+        """
+        Adds (filter, created_at) indexes so every events page is a bounded range scan.
+        The implicit rowid suffix of each index matches the (created_at, id) keyset order.
+        """
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_snapshots_created ON snapshots (created_at)"
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_camera_created
+            ON snapshots (camera_id, created_at)
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_location_created
+            ON snapshots (location, created_at)
+            """
+        )
+
+    def _migrate_event_covering_indexes(self, cursor):
+        """
+        Replaces the (filter, created_at) indexes with (filter, created_at, id, confidence).
+        The explicit id lets the (created_at, id) cursor bound the range search, and the
+        min_confidence filter is checked from the index, so rows that fail it are skipped
+        without a table lookup.
+        """
+        for name in (
+            "idx_snapshots_created",
+            "idx_snapshots_camera_created",
+            "idx_snapshots_location_created",
+            "idx_snapshots_lab_created",
+        ):
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_created_conf
+            ON snapshots (created_at, id, confidence)
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_camera_created_conf
+            ON snapshots (camera_id, created_at, id, confidence)
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_lab_created_conf
+            ON snapshots (lab_id, created_at, id, confidence)
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_location_created_conf
+            ON snapshots (location, created_at, id, confidence)
+            """
+        )
+
+    def _migrate_face_embeddings(self, cursor):
+        """
+        Converts a legacy authorised_faces table (JSON text 'encoding' column) into the
+        packed float32 'embedding' BLOB layout. Runs inside the caller's transaction.
+        """
+        cursor.execute("PRAGMA table_info(authorised_faces)")
+        columns = {row["name"] for row in cursor.fetchall()}
+        if "encoding" not in columns:
+            return
+
+        cursor.execute(
+            """
+            CREATE TABLE authorised_faces_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cursor.execute("SELECT id, name, encoding, created_at FROM authorised_faces")
+        rows = [
+            (
+                row["id"],
+                row["name"],
+                self.pack_embedding(json.loads(row["encoding"])),
+                row["created_at"],
+            )
+            for row in cursor.fetchall()
+        ]
+        cursor.executemany(
+            "INSERT INTO authorised_faces_new (id, name, embedding, created_at) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        cursor.execute("DROP TABLE authorised_faces")
+        cursor.execute("ALTER TABLE authorised_faces_new RENAME TO authorised_faces")
+        print(f"[SYSTEM] Migrated {len(rows)} face encodings from JSON to float32 BLOBs.")
+
+    @staticmethod
+    def pack_embedding(encoding) -> bytes:
+        """Serialises a 128-d face embedding into 512 bytes of little-endian float32."""
+        return np.asarray(encoding, dtype="<f4").tobytes()
+
+    @staticmethod
+    def unpack_embedding(blob: bytes) -> np.ndarray:
+        """Inverse of pack_embedding. Returns a read-only view over the BLOB bytes."""
+        return np.frombuffer(blob, dtype="<f4")
+
     def insert_snapshot(
         self,
         camera_id: str,
@@ -80,66 +296,257 @@ class Database:
         Logs a new detection event and its associated evidence filename into the database.
         """
         try:
-            with self.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+            with self.writer() as conn:
+                conn.execute(
                     """
                     INSERT INTO snapshots (camera_id, location, lab_id, detection_timestamp, confidence, filename)
-                    VALUES (?, ?, ?, ? ,? , ?)
+                    VALUES (?, ?, ?, ?, ?, ?)
                 """,
                     (camera_id, location, lab_id, timestamp, confidence, filename),
                 )
-                conn.commit()
         except sqlite3.Error as e:
             print(f"[DB ERROR] Failed to insert snapshot record: {e}")
 
-    def get_recent_events(self, limit: int = 50):
+    def insert_snapshots(self, records: list) -> list:
         """
-        Retrieves the most recent detection events to populate the Flask dashboard.
+        Logs several detection events in a single transaction.
+        Each record is a dict with the same keys as insert_snapshot's arguments.
+
+        Returns:
+            list: The committed rows as event dicts (same shape as get_events), oldest
+            first, or an empty list if the transaction failed.
         """
         try:
-            with self.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
+            with self.writer() as conn:
+                ids = []
+                for r in records:
+                    cursor = conn.execute(
+                        """
+                        INSERT INTO snapshots (camera_id, location, lab_id, detection_timestamp, confidence, filename)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                        (
+                            r["camera_id"],
+                            r["location"],
+                            r["lab_id"],
+                            r["timestamp"],
+                            r["confidence"],
+                            r["filename"],
+                        ),
+                    )
+                    ids.append(cursor.lastrowid)
+
+                # Read back server-side defaults (created_at) inside the same transaction.
+                placeholders = ", ".join("?" * len(ids))
+                rows = conn.execute(
+                    f"""
                     SELECT id, camera_id, location, lab_id, detection_timestamp, confidence, filename, created_at
                     FROM snapshots
-                    ORDER BY id DESC
-                    LIMIT ?
-                """,
-                    (limit,),
-                )
-                # Convert the sqlite3.Row objects into standard Python dictionaries
-                return [dict(row) for row in cursor.fetchall()]
+                    WHERE id IN ({placeholders})
+                    ORDER BY id
+                    """,
+                    ids,
+                ).fetchall()
+            return [dict(row) for row in rows]
         except sqlite3.Error as e:
-            print(f"[DB ERROR] Failed to fetch recent events: {e}")
+            print(f"[DB ERROR] Failed to insert {len(records)} snapshot records: {e}")
             return []
 
-    def upsert_authorised_face(self, name: str, encoding_list: list) -> bool:
+    def get_recent_events(self, limit: int = 50):
+        """
+        Retrieves the most recent detection events to populate the Flask dashboard.
+        """
+        events, _ = self.get_events(limit=limit)
+        return events
+
+    @staticmethod
+    def encode_cursor(created_at: str, event_id: int) -> str:
+        """Opaque, URL-safe pagination cursor pointing just past the given event."""
+        raw = f"{created_at}|{event_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """
+        Inverse of encode_cursor.
+
+        Raises:
+            ValueError: If the cursor was not produced by encode_cursor.
+        """
+        try:
+            created_at, event_id = (
+                base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+            )
+            return created_at, int(event_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid events cursor: {cursor}") from e
+
+    def build_events_query(
+        self,
+        limit: int = 50,
+        cursor: str = None,
+        camera_id: str = None,
+        lab_id: str = None,
+        location: str = None,
+        since: str = None,
+        until: str = None,
+        min_confidence: float = None,
+    ) -> tuple:
+        """
+        Builds the SQL behind get_events (also used to EXPLAIN it in the benchmark).
+
+        Returns:
+            tuple: (sql, params). One extra row is requested to detect a next page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        clauses = []
+        params = []
+
+        for column, value in (
+            ("camera_id", camera_id),
+            ("lab_id", lab_id),
+            ("location", location),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at <= ?")
+            params.append(until)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+        if cursor is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(self.decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"""
+            SELECT id, camera_id, location, lab_id, detection_timestamp, confidence, filename, created_at
+            FROM snapshots
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """
+        return sql, (*params, limit + 1)
+
+    def get_events(
+        self,
+        limit: int = 50,
+        cursor: str = None,
+        camera_id: str = None,
+        lab_id: str = None,
+        location: str = None,
+        since: str = None,
+        until: str = None,
+        min_confidence: float = None,
+    ):
+        """
+        Keyset-paginated, filterable event history, newest first.
+
+        Rows are ordered by (created_at, id) descending and each page resumes strictly
+        after the cursor, so page N costs the same as page 1 regardless of table size.
+        Each page is one index range search; the confidence filter is applied from the
+        index, so only returned rows are read from the table.
+
+        Args:
+            limit (int): Maximum number of events per page.
+            cursor (str | None): `next_cursor` returned by the previous page.
+            camera_id, lab_id, location (str | None): Exact-match filters.
+            since, until (str | None): Inclusive created_at bounds, "YYYY-MM-DD HH:MM:SS" (UTC).
+            min_confidence (float | None): Lower bound on the edge confidence.
+
+        Returns:
+            tuple: (list of event dicts, next_cursor or None when there are no more pages).
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        sql, params = self.build_events_query(
+            limit, cursor, camera_id, lab_id, location, since, until, min_confidence
+        )
+
+        try:
+            with self.reader() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to fetch events: {e}")
+            return [], None
+
+        # Convert the sqlite3.Row objects into standard Python dictionaries
+        events = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit and events:
+            last = events[-1]
+            next_cursor = self.encode_cursor(last["created_at"], last["id"])
+        return events, next_cursor
+
+    def upsert_authorised_face(self, name: str, encoding) -> bool:
         """
         Inserts or updates an authorised user's face embedding.
-        The encoding_list must be a standard Python list, which is converted to JSON.
+        The encoding (list or NumPy array) is stored as a packed float32 BLOB.
         """
         try:
-            encoding_json = json.dumps(encoding_list)
-            with self.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+            with self.writer() as conn:
+                conn.execute(
                     """
-                    INSERT INTO authorised_faces (name, encoding)
+                    INSERT INTO authorised_faces (name, embedding)
                     VALUES (?, ?)
-                    ON CONFLICT(name) DO UPDATE SET encoding=excluded.encoding
+                    ON CONFLICT(name) DO UPDATE SET embedding=excluded.embedding
                     """,
-                    (name, encoding_json),
+                    (name, self.pack_embedding(encoding)),
                 )
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             print(f"[DB ERROR] Failed to save face embedding: {e}")
             return False
 
+    def delete_authorised_face(self, name: str) -> bool:
+        """
+        Removes an authorised user's face embedding.
+        Returns True only if a row was actually deleted.
+        """
+        try:
+            with self.writer() as conn:
+                cursor = conn.execute("DELETE FROM authorised_faces WHERE name = ?", (name,))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] Failed to delete face embedding: {e}")
+            return False
+
+    def get_authorised_faces(self):
+        """
+        Loads every authorised face in one pass.
+
+        Returns:
+            tuple: (names list, (N, 128) float32 matrix built from the concatenated BLOBs).
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, embedding FROM authorised_faces ORDER BY id")
+            rows = cursor.fetchall()
+
+        names = [row["name"] for row in rows]
+        # One contiguous buffer, no per-row parsing.
+        matrix = self.unpack_embedding(b"".join(row["embedding"] for row in rows))
+        return names, matrix.reshape(len(names), -1) if names else matrix
+
     def close(self):
-        """Close the SQLite database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close the writer and every pooled read connection."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._pool_lock:
+            while True:
+                try:
+                    self._read_pool.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._read_created = 0
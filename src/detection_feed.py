@@ -0,0 +1,119 @@
+# File: src/detection_feed.py
+import threading
+import time
+
+import cv2
+
+# Pseudo camera id of the feed that carries the newest detection from any camera.
+ALL_CAMERAS = "*"
+
+
+class FeedSlot:
+    """Latest annotated frame of one feed, JPEG-encoded at most once per frame."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.frame = None
+        self.jpeg = None
+        self.jpeg_seq = 0  # Sequence number `jpeg` was encoded from.
+        self.encode_lock = threading.Lock()
+
+
+class DetectionFeed:
+    """
+    Per-camera live stream of annotated detection frames.
+
+    Detection workers only store a reference to the frame and bump a sequence number,
+    so publishing never waits on viewers. The JPEG is encoded lazily by the first viewer
+    that needs a given frame and reused by all others. Each viewer is throttled to
+    `max_fps` and always jumps to the newest frame, so slow clients skip frames instead
+    of queueing them.
+    """
+
+    def __init__(self, max_fps: float = 5.0, jpeg_quality: int = 80):
+        self.max_fps = max_fps
+        self.jpeg_quality = jpeg_quality
+        self.slots = {}  # key: camera_id, value: FeedSlot
+        self.lock = threading.Lock()
+
+        # Counters, exposed through stats().
+        self.published = 0
+        self.encoded = 0
+
+    def _slot(self, camera_id: str) -> FeedSlot:
+        with self.lock:
+            slot = self.slots.get(camera_id)
+            if slot is None:
+                slot = FeedSlot()
+                self.slots[camera_id] = slot
+            return slot
+
+    def publish(self, camera_id: str, frame):
+        """Makes `frame` the newest annotated frame of `camera_id`. O(1), never blocks on viewers."""
+        self.published += 1
+        for key in (camera_id, ALL_CAMERAS):
+            slot = self._slot(key)
+            with slot.cond:
+                slot.frame = frame
+                slot.seq += 1
+                slot.cond.notify_all()
+
+    def latest_frame(self, camera_id: str = ALL_CAMERAS):
+        """Returns the newest annotated frame matrix of a feed, or None."""
+        slot = self._slot(camera_id)
+        with slot.cond:
+            return slot.frame
+
+    def _jpeg_for(self, slot: FeedSlot, seq: int, frame) -> bytes:
+        """Returns the JPEG of frame `seq`, encoding it only if no other viewer has yet."""
+        with slot.encode_lock:
+            if slot.jpeg_seq != seq:
+                success, buffer = cv2.imencode(
+                    ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+                )
+                if not success:
+                    return None
+                slot.jpeg = buffer.tobytes()
+                slot.jpeg_seq = seq
+                self.encoded += 1
+            return slot.jpeg
+
+    def stream(self, camera_id: str = ALL_CAMERAS, max_fps: float = None):
+        """
+        Generator of JPEG bytes for one viewer, throttled to `max_fps`.
+        Yields only when a newer frame than the last one sent exists.
+        """
+        slot = self._slot(camera_id)
+        min_interval = 1.0 / (max_fps or self.max_fps)
+        sent_seq = 0
+        next_send = 0.0
+
+        while True:
+            # Throttle: never send faster than max_fps to this client.
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            with slot.cond:
+                if not slot.cond.wait_for(lambda: slot.seq > sent_seq, timeout=1.0):
+                    continue
+                # Jump straight to the newest frame; anything in between is skipped.
+                seq, frame = slot.seq, slot.frame
+
+            jpeg = self._jpeg_for(slot, seq, frame)
+            sent_seq = seq
+            next_send = time.monotonic() + min_interval
+            if jpeg is not None:
+                yield jpeg
+
+    def stats(self) -> dict:
+        """Returns publish/encode counters; encoded < published means frames were skipped."""
+        with self.lock:
+            cameras = [camera_id for camera_id in self.slots if camera_id != ALL_CAMERAS]
+        return {
+            "published": self.published,
+            "encoded": self.encoded,
+            "cameras": cameras,
+            "max_fps": self.max_fps,
+        }
@@ -0,0 +1,83 @@
+import threading
+
+import cv2
+
+# -------------------------
+# Shared MJPEG Broadcaster
+# -------------------------
+
+
+class FrameBroadcaster:
+    """
+    Encodes each new camera frame exactly once and fans the JPEG out to every viewer.
+
+    Subscribers block on a condition variable keyed on a frame sequence number instead
+    of polling. The encoder thread only runs while at least one viewer is subscribed.
+    """
+
+    def __init__(self, camera, jpeg_quality: int = 80, wait_timeout: float = 0.5):
+        self.camera = camera
+        self.jpeg_quality = jpeg_quality
+        self.wait_timeout = wait_timeout
+
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.jpeg = None
+        self.subscribers = 0
+        self.thread = None
+
+    def subscribe(self):
+        """Registers a viewer and starts the encoder thread if it is not running."""
+        with self.cond:
+            self.subscribers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self):
+        """Removes a viewer; the encoder thread exits once nobody is left."""
+        with self.cond:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def _run(self):
+        # Keep the camera capturing for as long as this broadcaster has viewers.
+        self.camera.acquire()
+        try:
+            last_camera_seq = 0
+            while True:
+                with self.cond:
+                    if self.subscribers == 0:
+                        self.thread = None
+                        return
+
+                # Block until the camera publishes a newer frame (short timeout to re-check viewers).
+                item = self.camera.wait_for_frame(last_camera_seq, timeout=self.wait_timeout)
+                if item is None:
+                    continue
+                last_camera_seq, _, frame = item
+
+                # The only JPEG encode for this frame, shared by every subscriber.
+                success, buffer = cv2.imencode(
+                    ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+                )
+                if not success:
+                    continue
+
+                with self.cond:
+                    self.jpeg = buffer.tobytes()
+                    self.seq += 1
+                    self.cond.notify_all()
+        finally:
+            self.camera.release()
+
+    def wait_for_frame(self, after_seq: int, timeout: float = 1.0):
+        """
+        Blocks until a frame newer than `after_seq` has been encoded.
+
+        Returns:
+            tuple | None: (seq, jpeg_bytes), or None on timeout.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq, timeout):
+                return None
+            return self.seq, self.jpeg
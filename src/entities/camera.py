@@ -1,5 +1,7 @@
 import cv2
 import threading
+import time
+from collections import deque
 
 # -------------------------
 # Camera Class for Streaming
@@ -7,31 +9,118 @@ import threading
 
 
 class Camera:
-    """Handles webcam capture and frame generation for streaming."""
+    """
+    Handles webcam capture and frame generation for streaming.
+
+    Captured frames go into a small ring buffer of (seq, timestamp, frame) entries with
+    monotonically increasing sequence numbers. Consumers block for "a frame newer than
+    seq N" instead of polling. Capture is suspended (and the device released) once nobody
+    has asked for a frame for `idle_timeout` seconds, and resumes on the next request.
+    """
+
+    def __init__(
+        self, source=0, width=320, height=240, buffer_size=4, idle_timeout=10.0
+    ):
+        self.source = source
+        self.width = width
+        self.height = height
+        self.idle_timeout = idle_timeout
+        self.cap = None  # Opened on demand by the capture thread.
+
+        self.cond = threading.Condition()
+        self.buffer = deque(maxlen=buffer_size)
+        self.frame_seq = 0  # Sequence number of the newest frame in the buffer.
+        self.subscribers = 0
+        self.last_demand = time.monotonic()
 
-    def __init__(self, source=0, width=320, height=240):
-        self.cap = cv2.VideoCapture(source)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.frame = None
         self.running = True
         self.thread = threading.Thread(target=self.update_frames, daemon=True)
         self.thread.start()
 
+    @property
+    def suspended(self) -> bool:
+        return self.cap is None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.source)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+    def _release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _idle(self) -> bool:
+        """True when no subscriber is attached and nobody asked for a frame recently."""
+        return (
+            self.subscribers == 0
+            and time.monotonic() - self.last_demand > self.idle_timeout
+        )
+
     def update_frames(self):
-        """Continuously capture frames from the webcam."""
-        while self.running:
-            success, frame = self.cap.read()
-            if success:
-                self.frame = frame
-
-    def get_frame_bytes(self):
-        """Returns current frame as JPEG bytes for streaming."""
-        if self.frame is None:
-            return None
-        ret, buffer = cv2.imencode(".jpg", self.frame)
-        return buffer.tobytes()
+        """Capture frames from the webcam while there is demand for them."""
+        while True:
+            with self.cond:
+                if self._idle() and self.cap is not None:
+                    print(f"[CAMERA] No viewers for {self.idle_timeout:.0f}s. Suspending {self.source}.")
+                    self._release()
+                    # Stale frames must not be served once capture resumes.
+                    self.buffer.clear()
+
+                # Sleep until someone wants frames again (or the camera is stopped).
+                self.cond.wait_for(lambda: not self.running or not self._idle())
+                if not self.running:
+                    break
+
+                if self.cap is None:
+                    print(f"[CAMERA] Resuming capture on {self.source}.")
+                    self._open()
+                cap = self.cap
+
+            # cap.read() blocks until the device delivers the next frame, pacing the loop.
+            success, frame = cap.read()
+            if not success:
+                time.sleep(0.1)  # Device missing or busy; do not spin.
+                continue
+
+            with self.cond:
+                self.frame_seq += 1
+                self.buffer.append((self.frame_seq, time.time(), frame))
+                self.cond.notify_all()
+
+        self._release()
+
+    def acquire(self):
+        """Registers a long-lived consumer (e.g. a stream); capture stays on until released."""
+        with self.cond:
+            self.subscribers += 1
+            self.cond.notify_all()
+
+    def release(self):
+        """Unregisters a consumer; capture suspends after the idle timeout."""
+        with self.cond:
+            self.subscribers = max(0, self.subscribers - 1)
+            self.last_demand = time.monotonic()
+
+    def wait_for_frame(self, after_seq: int = 0, timeout: float = 1.0):
+        """
+        Blocks until a frame newer than `after_seq` is available, waking the camera if idle.
+
+        Returns:
+            tuple | None: (seq, timestamp, frame) of the newest frame, or None on timeout.
+        """
+        with self.cond:
+            self.last_demand = time.monotonic()
+            self.cond.notify_all()
+            if not self.cond.wait_for(
+                lambda: self.frame_seq > after_seq and self.buffer, timeout
+            ):
+                return None
+            return self.buffer[-1]
 
     def stop(self):
-        self.running = False
-        self.cap.release()
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout=2.0)
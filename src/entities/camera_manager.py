@@ -1,3 +1,4 @@
+from entities.broadcaster import FrameBroadcaster
 from entities.camera import Camera
 
 
@@ -5,10 +6,20 @@ class CameraManager:
     def __init__(self):
         # key: camera_id, value: Camera object
         self.cameras = {}
+        # key: camera_id, value: FrameBroadcaster shared by all viewers of that camera
+        self.broadcasters = {}
 
     def add_camera(self, camera_id, source=0):
         """Add a new camera. source can be local index or remote URL"""
-        self.cameras[camera_id] = Camera(source)
+        camera = Camera(source)
+        self.cameras[camera_id] = camera
+        self.broadcasters[camera_id] = FrameBroadcaster(camera)
+
+    def get_broadcaster(self, camera_id: str):
+        """
+        Retrieves the MJPEG broadcaster of a camera by its ID.
+        """
+        return self.broadcasters.get(camera_id)
 
     def get_camera(self, camera_id: str):
         """
@@ -16,13 +27,6 @@ class CameraManager:
         """
         return self.cameras.get(camera_id)
 
-    def get_frame(self, camera_id):
-        """Return current frame as JPEG bytes for the given camera."""
-        cam = self.cameras.get(camera_id)
-        if cam:
-            return cam.get_frame_bytes()
-        return None
-
     def stop_all(self):
         """Stop all camera threads."""
         for cam in self.cameras.values():
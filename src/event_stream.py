@@ -0,0 +1,98 @@
+# File: src/event_stream.py
+import json
+import threading
+import time
+from collections import deque
+
+
+class EventBroker:
+    """
+    In-process publisher for Server-Sent Events.
+
+    Every published event gets an id of the form "<boot>-<n>" and is kept in a bounded
+    replay buffer, so a reconnecting client that sends Last-Event-ID receives exactly the
+    events it missed. Ids from a previous process, or older than the buffer, trigger a
+    single "reset" event telling the client to reload its state from the REST API.
+    """
+
+    def __init__(self, replay_size: int = 1000, heartbeat: float = 15.0):
+        self.boot = str(int(time.time()))
+        self.heartbeat = heartbeat
+        self.cond = threading.Condition()
+        self.buffer = deque(maxlen=replay_size)  # (n, event_type, json_data)
+        self.next_n = 1
+
+    def publish(self, event_type: str, data: dict):
+        """Appends an event to the replay buffer and wakes every connected client."""
+        payload = json.dumps(data, default=str)
+        with self.cond:
+            self.buffer.append((self.next_n, event_type, payload))
+            self.next_n += 1
+            self.cond.notify_all()
+
+    def _parse_last_id(self, last_event_id: str):
+        """Returns the sequence number to resume after, or None if the id cannot be honoured."""
+        try:
+            boot, n = last_event_id.rsplit("-", 1)
+            n = int(n)
+        except (AttributeError, ValueError):
+            return None
+        return n if boot == self.boot else None
+
+    def _format(self, n: int, event_type: str, payload: str) -> str:
+        return f"id: {self.boot}-{n}\nevent: {event_type}\ndata: {payload}\n\n"
+
+    def stream(self, last_event_id: str = None):
+        """
+        Generator of SSE-formatted strings for one client.
+
+        Args:
+            last_event_id (str | None): Value of the client's Last-Event-ID header.
+        """
+        reset = False
+        with self.cond:
+            newest = self.next_n - 1
+            if last_event_id:
+                sent = self._parse_last_id(last_event_id)
+                oldest = self.buffer[0][0] if self.buffer else self.next_n
+                if sent is None or sent > newest or sent < oldest - 1:
+                    # Cannot replay the gap: the client must refetch, then stream from now.
+                    sent, reset = newest, True
+            else:
+                # A fresh client starts from "now"; it loads history from the REST API.
+                sent = newest
+
+        # Ask EventSource to reconnect quickly after a dropped connection.
+        yield "retry: 2000\n\n"
+        if reset:
+            yield self._format(sent, "reset", "{}")
+
+        while True:
+            lagged = False
+            with self.cond:
+                if not self.cond.wait_for(lambda: self.next_n - 1 > sent, self.heartbeat):
+                    pending = None
+                else:
+                    pending = [entry for entry in self.buffer if entry[0] > sent]
+                    if not pending or pending[0][0] > sent + 1:
+                        # This client fell behind the replay buffer while connected: same
+                        # recovery as a late reconnect, refetch then continue from now.
+                        sent, pending, lagged = self.next_n - 1, [], True
+
+            if pending is None:
+                # SSE comment line keeps proxies and the browser from timing out.
+                yield ": keep-alive\n\n"
+                continue
+            if lagged:
+                yield self._format(sent, "reset", "{}")
+
+            for n, event_type, payload in pending:
+                sent = n
+                yield self._format(n, event_type, payload)
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "last_event_id": f"{self.boot}-{self.next_n - 1}",
+                "buffered": len(self.buffer),
+            }
@@ -0,0 +1,165 @@
+# File: src/evidence_writer.py
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+from metrics import EVIDENCE_DROPPED, STAGE_LATENCY
+
+
+class EvidenceWriter:
+    """
+    Background persistence stage for validated detections.
+
+    Detection workers hand over the annotated frame and its metadata without waiting.
+    A single writer thread JPEG-encodes and writes the evidence files, then inserts the
+    snapshot rows in one SQLite transaction per `flush_interval` or `batch_size` rows.
+    `on_commit`, if given, receives each committed row (as an event dict) once the
+    transaction has succeeded. `jpeg_quality` defaults to 95, cv2.imwrite's own default.
+    """
+
+    def __init__(
+        self,
+        db,
+        directory: str,
+        max_queue: int = 64,
+        batch_size: int = 32,
+        flush_interval: float = 0.5,
+        jpeg_quality: int = 95,
+        on_commit=None,
+    ):
+        self.db = db
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.jpeg_quality = jpeg_quality
+        self.on_commit = on_commit
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+
+        # Counters, exposed through stats().
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        """Spawns the writer thread."""
+        self.thread = threading.Thread(
+            target=self._run, name="evidence-writer", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, frame, record: dict) -> bool:
+        """
+        Queues one piece of evidence without blocking the caller.
+
+        Args:
+            frame (np.ndarray): Annotated frame to save as record["filename"].
+            record (dict): Keyword arguments for the snapshots row (see Database.insert_snapshots).
+
+        Returns:
+            bool: False if the queue was full and the evidence was dropped.
+        """
+        try:
+            self.queue.put_nowait((frame, record))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            EVIDENCE_DROPPED.inc()
+            print(f"[EVIDENCE] Warning: Writer queue full. Dropped {record['filename']}.")
+            return False
+
+    def _write_file(self, frame, filename: str) -> bool:
+        success, buffer = cv2.imencode(
+            ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        )
+        if not success:
+            return False
+
+        # Write beside the target and rename, so the dashboard never serves a partial file.
+        filepath = os.path.join(self.directory, filename)
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer)
+        os.replace(tmp_path, filepath)
+        return True
+
+    def _flush(self, records: list):
+        if not records:
+            return
+        t_start = time.perf_counter()
+        events = self.db.insert_snapshots(records)
+        elapsed = time.perf_counter() - t_start
+        # Every camera with a row in this transaction waited for the whole commit.
+        for camera_id in {record["camera_id"] for record in records}:
+            STAGE_LATENCY.labels("db", camera_id).observe(elapsed)
+        if not events:
+            self.failed += len(records)
+            records.clear()
+            return
+        records.clear()
+        self.flushes += 1
+        self.written += len(events)
+        print(f"[DB] Logged {len(events)} incident(s) to database in one transaction.")
+        if self.on_commit is not None:
+            for event in events:
+                self.on_commit(event)
+
+    def _run(self):
+        records = []
+        last_flush = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self.queue.get(timeout=timeout)
+                if item is None:
+                    stopping = True  # Sentinel: flush what we have and exit.
+                else:
+                    frame, record = item
+                    try:
+                        t_start = time.perf_counter()
+                        if self._write_file(frame, record["filename"]):
+                            STAGE_LATENCY.labels("file_io", record["camera_id"]).observe(
+                                time.perf_counter() - t_start
+                            )
+                            records.append(record)
+                        else:
+                            self.failed += 1
+                            print(f"[EVIDENCE] Error: Failed to encode {record['filename']}.")
+                    except OSError as e:
+                        self.failed += 1
+                        print(f"[EVIDENCE] Error: Failed to write {record['filename']}. {e}")
+            except queue.Empty:
+                pass
+
+            if (
+                stopping
+                or len(records) >= self.batch_size
+                or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self._flush(records)
+                last_flush = time.monotonic()
+
+    def stop(self, timeout: float = 10.0):
+        """Writes out everything still queued, commits the last batch and joins the thread."""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def stats(self) -> dict:
+        """Returns queue depth and persistence counters for monitoring."""
+        return {
+            "depth": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,241 @@
+# File: src/face_index.py
+import copy
+
+import numpy as np
+
+# face_recognition produces 128-d dlib embeddings compared with Euclidean distance.
+EMBEDDING_DIM = 128
+
+# Galleries at least this large switch to the approximate (IVF) search when ann="auto".
+ANN_AUTO_THRESHOLD = 10000
+
+
+class FaceIndex:
+    """
+    Face embedding gallery stored as one contiguous float32 matrix.
+
+    Every face in a frame is matched against the whole gallery with a single vectorised
+    distance computation. For very large galleries an optional inverted-file (IVF) mode
+    clusters the embeddings with k-means and only scans the `n_probe` closest clusters.
+    """
+
+    def __init__(
+        self,
+        names: list = None,
+        encodings=None,
+        ann="auto",
+        n_lists: int = None,
+        n_probe: int = 8,
+    ):
+        """
+        Args:
+            names (list[str]): Identity name for each row of `encodings`.
+            encodings (array-like): (N, 128) embeddings, in the same order as `names`.
+            ann (bool | str): True for IVF search, False for exact, "auto" to decide by gallery size.
+            n_lists (int | None): Number of IVF clusters. Defaults to sqrt(N).
+            n_probe (int): Number of clusters scanned per query in IVF mode.
+        """
+        self.names = list(names or [])
+        # key: name, value: row in self.matrix
+        self.positions = {name: row for row, name in enumerate(self.names)}
+        if encodings is None or len(self.names) == 0:
+            self.matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        else:
+            self.matrix = np.ascontiguousarray(encodings, dtype=np.float32).reshape(
+                len(self.names), EMBEDDING_DIM
+            )
+
+        # Squared norms are reused by every query: ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        self.ann_setting = ann
+        if ann == "auto":
+            ann = len(self.names) >= ANN_AUTO_THRESHOLD
+        self.ann = bool(ann) and len(self.names) > 1
+        self.n_probe = n_probe
+        self.centroids = None
+        self.lists = None
+        self.assignment = None  # IVF cluster of each row
+        if self.ann:
+            self._build_ivf(n_lists or int(np.sqrt(len(self.names))))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _build_ivf(self, n_lists: int, iterations: int = 10):
+        """Clusters the gallery with a few rounds of k-means to form the inverted lists."""
+        n_lists = max(1, min(n_lists, len(self.names)))
+        rng = np.random.default_rng(0)  # Deterministic so rebuilds give the same index.
+        centroids = self.matrix[rng.choice(len(self.names), n_lists, replace=False)]
+
+        for _ in range(iterations):
+            assignment = self._nearest_rows(self.matrix, centroids)
+            for c in range(n_lists):
+                members = self.matrix[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+
+        self.assignment = self._nearest_rows(self.matrix, centroids)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(self.assignment == c) for c in range(n_lists)]
+
+    def with_identity(self, name: str, encoding) -> "FaceIndex":
+        """
+        Returns a new index with `name` added, or its embedding replaced if already present.
+
+        The current index is never modified, so threads still searching it keep a
+        consistent view while the new one is published (copy-on-write).
+        """
+        vector = np.asarray(encoding, dtype=np.float32).reshape(EMBEDDING_DIM)
+        clone = copy.copy(self)
+        row = self.positions.get(name)
+
+        if row is None:
+            row = len(self.names)
+            clone.names = self.names + [name]
+            clone.positions = dict(self.positions)
+            clone.positions[name] = row
+            clone.matrix = np.vstack([self.matrix, vector[None, :]])
+            clone.sq_norms = np.append(self.sq_norms, np.float32(vector @ vector))
+
+            # Crossing the auto threshold is the one case that warrants a full IVF build.
+            if (
+                self.ann_setting == "auto"
+                and not self.ann
+                and len(clone.names) >= ANN_AUTO_THRESHOLD
+            ):
+                return FaceIndex(clone.names, clone.matrix, n_probe=self.n_probe)
+        else:
+            clone.matrix = self.matrix.copy()
+            clone.matrix[row] = vector
+            clone.sq_norms = self.sq_norms.copy()
+            clone.sq_norms[row] = vector @ vector
+
+        if self.ann:
+            # Slot the embedding into its nearest existing cluster instead of re-running k-means.
+            cluster = int(self._nearest_rows(vector[None, :], self.centroids)[0])
+            clone.lists = list(self.lists)
+            if row < len(self.assignment):
+                old = self.assignment[row]
+                clone.lists[old] = self.lists[old][self.lists[old] != row]
+                clone.assignment = self.assignment.copy()
+                clone.assignment[row] = cluster
+            else:
+                clone.assignment = np.append(self.assignment, cluster)
+            clone.lists[cluster] = np.append(clone.lists[cluster], row)
+
+        return clone
+
+    def without_identity(self, name: str) -> "FaceIndex":
+        """
+        Returns a new index with `name` removed (or self if it is not present).
+
+        The last row is moved into the freed slot so no other row has to shift.
+        """
+        row = self.positions.get(name)
+        if row is None:
+            return self
+
+        last = len(self.names) - 1
+        clone = copy.copy(self)
+        clone.names = list(self.names)
+        clone.positions = dict(self.positions)
+        clone.matrix = self.matrix[:last].copy()
+        clone.sq_norms = self.sq_norms[:last].copy()
+        del clone.positions[name]
+
+        if row != last:
+            moved = self.names[last]
+            clone.names[row] = moved
+            clone.positions[moved] = row
+            clone.matrix[row] = self.matrix[last]
+            clone.sq_norms[row] = self.sq_norms[last]
+        clone.names.pop()
+
+        if self.ann:
+            clone.lists = list(self.lists)
+            removed_cluster = self.assignment[row]
+            clone.lists[removed_cluster] = self.lists[removed_cluster][
+                self.lists[removed_cluster] != row
+            ]
+            clone.assignment = self.assignment[:last].copy()
+            if row != last:
+                moved_cluster = self.assignment[last]
+                members = clone.lists[moved_cluster]
+                clone.lists[moved_cluster] = np.where(members == last, row, members)
+                clone.assignment[row] = moved_cluster
+
+        return clone
+
+    @staticmethod
+    def _squared_distances(queries: np.ndarray, rows: np.ndarray, row_sq_norms=None):
+        """(M, N) matrix of squared Euclidean distances between queries and rows."""
+        if row_sq_norms is None:
+            row_sq_norms = np.einsum("ij,ij->i", rows, rows)
+        q_sq = np.einsum("ij,ij->i", queries, queries)
+        d2 = q_sq[:, None] + row_sq_norms[None, :] - 2.0 * (queries @ rows.T)
+        # Guard against tiny negatives from floating point cancellation.
+        return np.maximum(d2, 0.0, out=d2)
+
+    @classmethod
+    def _nearest_rows(cls, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return np.argmin(cls._squared_distances(queries, rows), axis=1)
+
+    @staticmethod
+    def _top_k(d2: np.ndarray, k: int):
+        """Indices of the k smallest values in each row, sorted ascending."""
+        k = min(k, d2.shape[1])
+        if k < d2.shape[1]:
+            idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.tile(np.arange(d2.shape[1]), (d2.shape[0], 1))
+        order = np.take_along_axis(d2, idx, axis=1).argsort(axis=1)
+        return np.take_along_axis(idx, order, axis=1)
+
+    def search(self, queries, k: int = 1) -> list:
+        """
+        Finds the k nearest gallery identities for every query embedding.
+
+        Args:
+            queries (array-like): (M, 128) embeddings, e.g. every face found in one frame.
+            k (int): Number of neighbours to return per query.
+
+        Returns:
+            list[list[tuple]]: For each query, up to k (name, distance) pairs, nearest first.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        if len(queries) == 0:
+            return []
+        if len(self.names) == 0:
+            return [[] for _ in range(len(queries))]
+
+        if not self.ann:
+            d2 = self._squared_distances(queries, self.matrix, self.sq_norms)
+            idx = self._top_k(d2, k)
+            dist = np.sqrt(np.take_along_axis(d2, idx, axis=1))
+            return [
+                [(self.names[i], float(d)) for i, d in zip(row_idx, row_dist)]
+                for row_idx, row_dist in zip(idx, dist)
+            ]
+
+        # IVF: only scan the members of the n_probe closest clusters for each query.
+        probe = self._top_k(
+            self._squared_distances(queries, self.centroids), self.n_probe
+        )
+        results = []
+        for query, lists in zip(queries, probe):
+            candidates = np.concatenate([self.lists[c] for c in lists])
+            if len(candidates) == 0:
+                results.append([])
+                continue
+            d2 = self._squared_distances(
+                query[None, :], self.matrix[candidates], self.sq_norms[candidates]
+            )
+            idx = self._top_k(d2, k)[0]
+            results.append(
+                [
+                    (self.names[candidates[i]], float(np.sqrt(d2[0, i])))
+                    for i in idx
+                ]
+            )
+        return results
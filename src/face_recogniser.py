@@ -1,103 +1,175 @@
-import json
-
 import face_recognition
 import numpy as np
 import os
 import cv2
+import threading
 
 from db import Database
+from face_index import FaceIndex
+
+
+def _box_iou(a, b) -> float:
+    """Intersection over union of two (top, right, bottom, left) boxes."""
+    inter_h = min(a[2], b[2]) - max(a[0], b[0])
+    inter_w = min(a[1], b[1]) - max(a[3], b[3])
+    if inter_h <= 0 or inter_w <= 0:
+        return 0.0
+    inter = inter_h * inter_w
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter)
 
 
 class FaceRecogniser:
-    def __init__(self):
+    def __init__(
+        self, tolerance: float = 0.5, top_k: int = 3, max_region_size: int = 480
+    ):
         """
         Initialises the recogniser and loads all known facial encodings
         directly from the SQLite database.
+
+        Args:
+            tolerance (float): Maximum embedding distance accepted as a match.
+            top_k (int): Number of nearest identities reported per face.
+            max_region_size (int): Longest side (px) a region crop is scaled down to.
         """
-        self.known_encodings = []
-        self.known_names = []
+        self.tolerance = tolerance
+        self.top_k = top_k
+        self.max_region_size = max_region_size
+        # Running total of face_encodings() outputs, to monitor the tracker's savings.
+        self.encodings_computed = 0
+        self.index = FaceIndex()
+        # Serialises writers only (index swaps and the encodings_computed counter); readers
+        # grab self.index once per frame without locking.
+        self.update_lock = threading.Lock()
         self._load_encodings_from_db()
 
     def _load_encodings_from_db(self):
         """
-        Connects to the database, retrieves the serialised JSON encodings,
-        and reconstructs them into NumPy arrays for mathematical comparison.
+        Connects to the database and loads every packed float32 embedding
+        into a single FaceIndex matrix for mathematical comparison.
         """
         db = Database()
         try:
-            with db.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT name, encoding FROM authorised_faces")
-                rows = cursor.fetchall()
+            names, encodings = db.get_authorised_faces()
 
-                for row in rows:
-                    name = row["name"]
-                    # Parse the JSON string back into a standard Python list
-                    encoding_list = json.loads(row["encoding"])
-                    # Convert the list back into a NumPy array required by the face_recognition library
-                    encoding_array = np.array(encoding_list)
-
-                    self.known_names.append(name)
-                    self.known_encodings.append(encoding_array)
+            # Build the new index off to the side, then publish it in one assignment.
+            self.index = FaceIndex(names, encodings)
 
             print(
-                f"[INFO] Successfully loaded {len(self.known_names)} known face encodings from the database."
+                f"[INFO] Successfully loaded {len(self.index)} known face encodings from the database."
             )
         except Exception as e:
             print(f"[ERROR] Critical failure loading encodings from database: {e}")
+        finally:
+            db.close()
 
-    def recognise(self, frame_bgr):
+    def add_or_update(self, name: str, encoding):
+        """
+        Adds a newly registered identity (or replaces its embedding) in the live index
+        without touching the database or reloading any other row.
+        """
+        with self.update_lock:
+            # Copy-on-write: detection threads keep searching the old index until the swap.
+            self.index = self.index.with_identity(name, encoding)
+        print(f"[INFO] Face index updated for '{name}' ({len(self.index)} identities).")
+
+    def remove(self, name: str):
+        """Removes a single identity from the live index."""
+        with self.update_lock:
+            self.index = self.index.without_identity(name)
+        print(f"[INFO] Face index entry removed for '{name}' ({len(self.index)} identities).")
+
+    def recognise(self, frame_bgr, regions: list = None):
         """
         Detect and recognise faces in a single OpenCV frame.
 
+        Args:
+            frame_bgr (np.ndarray): OpenCV image matrix.
+            regions (list | None): Optional (left, top, right, bottom) boxes in frame
+                coordinates. When given, face detection only scans these crops instead
+                of the whole frame.
+
         Returns:
-            List of dicts with name, confidence, and bounding box.
+            List of dicts with name, confidence, and bounding box (frame coordinates).
         """
-        # Convert OpenCV BGR -> RGB.
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+        if regions is None:
+            height, width = frame_bgr.shape[:2]
+            regions = [(0, 0, width, height)]
+            max_side = None
+        else:
+            max_side = self.max_region_size
+
+        face_locations = []
+        face_encodings = []
+        computed = 0
+
+        for left, top, right, bottom in regions:
+            crop = frame_bgr[top:bottom, left:right]
+            if crop.size == 0:
+                continue
+
+            # Shrink very large crops (person close to the camera): the face is big anyway.
+            scale = 1.0
+            if max_side and max(crop.shape[:2]) > max_side:
+                scale = max_side / max(crop.shape[:2])
+                crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+            # Convert OpenCV BGR -> RGB.
+            crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+            locations = face_recognition.face_locations(crop_rgb)
+            if not locations:
+                continue
+            encodings = face_recognition.face_encodings(crop_rgb, locations)
+            computed += len(encodings)
+
+            for (c_top, c_right, c_bottom, c_left), encoding in zip(locations, encodings):
+                # Map the crop-relative box back to frame coordinates.
+                location = (
+                    top + int(c_top / scale),
+                    left + int(c_right / scale),
+                    top + int(c_bottom / scale),
+                    left + int(c_left / scale),
+                )
+                # Overlapping person boxes can surface the same face twice.
+                if any(_box_iou(location, seen) > 0.5 for seen in face_locations):
+                    continue
+                face_locations.append(location)
+                face_encodings.append(encoding)
 
-        face_locations = face_recognition.face_locations(frame_rgb)
-        face_encodings = face_recognition.face_encodings(frame_rgb, face_locations)
+        if computed:
+            # Several detection workers recognise at once; one locked add per call.
+            with self.update_lock:
+                self.encodings_computed += computed
 
         results = []
-
-        # If the database is empty, all detected faces are immediately flagged as Unknown
-        if not self.known_encodings:
-            for top, right, bottom, left in face_locations:
-                results.append(
-                    {
-                        "name": "Unknown",
-                        "confidence": 0.0,
-                        "box": (left, top, right, bottom),
-                    }
-                )
+        if not face_locations:
             return results
 
-        for (top, right, bottom, left), encoding in zip(face_locations, face_encodings):
-            # Compare the live face encoding against all database encodings
-            matches = face_recognition.compare_faces(
-                self.known_encodings, encoding, tolerance=0.5
-            )
+        # Match every face in the frame against the whole gallery in one vectorised pass.
+        # An empty gallery yields no candidates, so every face is flagged as Unknown.
+        matches = self.index.search(np.array(face_encodings), k=self.top_k)
 
+        for (top, right, bottom, left), candidates in zip(face_locations, matches):
             name = "Unknown"
             confidence = 0.0
 
-            if True in matches:
-                # Find the index of the first match to retrieve the corresponding name
-                idx = matches.index(True)
-                name = self.known_names[idx]
-
-                # Calculate the mathematical distance to derive a confidence percentage
-                distances = face_recognition.face_distance(
-                    self.known_encodings, encoding
-                )
-                confidence = float(1.0 - distances[idx])
+            # Candidates are sorted nearest first, so only the best one decides the identity.
+            if candidates and candidates[0][1] <= self.tolerance:
+                name = candidates[0][0]
+                # Derive a confidence percentage from the mathematical distance
+                confidence = float(1.0 - candidates[0][1])
 
             results.append(
                 {
                     "name": name,
                     "confidence": round(confidence, 3),
                     "box": (left, top, right, bottom),
+                    "candidates": [
+                        {"name": cand_name, "distance": round(distance, 3)}
+                        for cand_name, distance in candidates
+                    ],
                 }
             )
 
@@ -105,11 +177,9 @@ class FaceRecogniser:
 
     def reload_database(self):
         """
-        Clears the current arrays and reloads them from the database.
-        Call this method whenever a new user is registered to update the system
-        without requiring a full application restart.
+        Rebuilds the whole face index from the database.
+        Registration uses add_or_update() instead; this is only needed if the
+        table was modified outside the running application.
         """
         print("[INFO] Reloading facial encodings from database...")
-        self.known_encodings.clear()
-        self.known_names.clear()
         self._load_encodings_from_db()
@@ -0,0 +1,63 @@
+# File: src/frame_envelope.py
+import json
+import struct
+
+# -------------------------
+# Binary Frame Envelope (v1)
+# -------------------------
+# Layout of an MQTT payload published by edge_pi/scripts/capture_publish.py:
+#
+#   offset  size  field
+#   0       4     magic b"SITF"
+#   4       1     version (currently 1)
+#   5       1     flags (reserved, 0)
+#   6       2     metadata length N (big-endian uint16)
+#   8       N     UTF-8 JSON metadata (camera_id, location, lab_id, timestamp, confidence)
+#   8 + N   ...   raw JPEG bytes
+#
+# Keep in sync with edge_pi/scripts/frame_envelope.py.
+MAGIC = b"SITF"
+VERSION = 1
+HEADER = struct.Struct(">4sBBH")
+
+
+def is_binary_frame(payload) -> bool:
+    """Returns True if the payload starts with the binary envelope magic."""
+    return payload[:4] == MAGIC
+
+
+def encode_frame(metadata: dict, jpeg_bytes) -> bytes:
+    """
+    Packs metadata and JPEG bytes into a v1 envelope.
+    Used by the load harness; the edge carries its own copy of this function.
+    """
+    meta = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    return b"".join([HEADER.pack(MAGIC, VERSION, 0, len(meta)), meta, jpeg_bytes])
+
+
+def decode_frame(payload):
+    """
+    Splits a binary envelope into its metadata and image without copying the JPEG.
+
+    Returns:
+        tuple: (metadata dict, memoryview over the JPEG bytes inside `payload`).
+
+    Raises:
+        ValueError: If the payload is truncated, has the wrong magic or an unsupported version.
+    """
+    view = memoryview(payload)
+    if len(view) < HEADER.size:
+        raise ValueError("Frame envelope is shorter than its header.")
+
+    magic, version, _flags, meta_len = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Payload is not a binary frame envelope.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported frame envelope version {version}.")
+
+    meta_end = HEADER.size + meta_len
+    if len(view) < meta_end:
+        raise ValueError("Frame envelope metadata is truncated.")
+
+    metadata = json.loads(bytes(view[HEADER.size : meta_end]))
+    return metadata, view[meta_end:]
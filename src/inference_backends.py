@@ -0,0 +1,256 @@
+# File: src/inference_backends.py
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import time
+
+import numpy as np
+from ultralytics import YOLO
+
+MODELS_DIR = "models"
+
+# Records which exported artefact belongs to which (weights, backend) pair.
+EXPORT_MANIFEST = os.path.join(MODELS_DIR, "exports.json")
+
+# Latest local benchmark, consulted when the backend is "auto".
+BENCHMARK_RESULTS = os.path.join(MODELS_DIR, "backend_benchmark.json")
+
+# key: backend name, value: ultralytics export() arguments (None = run the .pt directly).
+# ONNX and OpenVINO are exported with a dynamic batch axis so MicroBatcher batches fit.
+BACKENDS = {
+    "pytorch": None,
+    "onnx": {"format": "onnx", "dynamic": True},
+    "openvino": {"format": "openvino", "dynamic": True},
+    "tflite": {"format": "tflite", "int8": True},
+}
+
+# Backends whose exported graph only accepts a batch of one frame.
+SINGLE_FRAME_BACKENDS = {"tflite"}
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def resolve_backend(weights: str, backend: str) -> str:
+    """Maps "auto" to the fastest benchmarked backend; other names pass through."""
+    return fastest_backend(weights) if backend == "auto" else backend
+
+
+def fastest_backend(weights: str) -> str:
+    """Returns the backend with the lowest benchmarked latency for `weights`, or "pytorch"."""
+    results = _read_json(BENCHMARK_RESULTS).get(weights, {})
+    timings = {name: r["p50_ms"] for name, r in results.items() if "p50_ms" in r}
+    return min(timings, key=timings.get) if timings else "pytorch"
+
+
+def export_model(weights: str, backend: str, imgsz: int = 640) -> str:
+    """
+    One-time export of the PyTorch weights to the given backend format.
+    The exported path is cached in models/exports.json, so later starts skip the export.
+
+    Returns:
+        str: Path to load with ultralytics.YOLO.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}'. Expected one of {list(BACKENDS)}.")
+
+    export_args = BACKENDS[backend]
+    if export_args is None:
+        return weights
+
+    # The shape mode is part of the key, so older fixed-batch exports are not reused.
+    shape = "dynamic" if export_args.get("dynamic") else "static"
+    key = f"{weights}:{backend}:{imgsz}:{shape}"
+    manifest = _read_json(EXPORT_MANIFEST)
+    cached = manifest.get(key)
+    if cached and os.path.exists(cached):
+        return cached
+
+    print(f"[YOLO] Exporting {weights} to {backend} (one-time)...")
+    exported = YOLO(weights).export(imgsz=imgsz, **export_args)
+    manifest[key] = str(exported)
+    _write_json(EXPORT_MANIFEST, manifest)
+    return str(exported)
+
+
+@contextlib.contextmanager
+def _swapped(owner, name: str, replacement):
+    original = getattr(owner, name)
+    setattr(owner, name, replacement)
+    try:
+        yield
+    finally:
+        setattr(owner, name, original)
+
+
+@contextlib.contextmanager
+def _runtime_threads(backend: str, threads: int):
+    """
+    Caps intra-op threads through each runtime's own options while ultralytics builds its
+    session (on the first prediction). ultralytics does not expose these options, so the
+    runtime constructor it calls is wrapped for the duration of that build only.
+    """
+    with contextlib.ExitStack() as stack:
+        if backend == "onnx":
+            import onnxruntime as ort
+
+            base = ort.InferenceSession
+
+            class CappedSession(base):
+                def __init__(self, path_or_bytes, sess_options=None, *args, **kwargs):
+                    sess_options = sess_options or ort.SessionOptions()
+                    sess_options.intra_op_num_threads = threads
+                    super().__init__(path_or_bytes, sess_options, *args, **kwargs)
+
+            stack.enter_context(_swapped(ort, "InferenceSession", CappedSession))
+
+        elif backend == "openvino":
+            import openvino as ov
+
+            base = ov.Core
+
+            class CappedCore(base):
+                def compile_model(self, *args, config=None, **kwargs):
+                    config = {**(config or {}), "INFERENCE_NUM_THREADS": threads}
+                    return super().compile_model(*args, config=config, **kwargs)
+
+            stack.enter_context(_swapped(ov, "Core", CappedCore))
+
+        elif backend == "tflite":
+            # ultralytics imports whichever TFLite interpreter is installed.
+            for module_name in ("tflite_runtime.interpreter", "ai_edge_litert.interpreter"):
+                try:
+                    module = importlib.import_module(module_name)
+                except ImportError:
+                    continue
+                stack.enter_context(
+                    _swapped(module, "Interpreter", _with_num_threads(module.Interpreter, threads))
+                )
+            try:
+                import tensorflow as tf
+            except ImportError:
+                tf = None
+            if tf is not None:
+                stack.enter_context(
+                    _swapped(tf.lite, "Interpreter", _with_num_threads(tf.lite.Interpreter, threads))
+                )
+        yield
+
+
+def _with_num_threads(interpreter_cls, threads: int):
+    def build(*args, **kwargs):
+        kwargs.setdefault("num_threads", threads)
+        return interpreter_cls(*args, **kwargs)
+
+    return build
+
+
+def load_model(
+    weights: str,
+    backend: str = "pytorch",
+    threads: int = None,
+    imgsz: int = 640,
+    warmup_shape: tuple = (360, 640, 3),
+) -> YOLO:
+    """
+    Loads `weights` through the requested backend and runs one warm-up inference,
+    so the first real frame does not pay for graph compilation and allocation.
+
+    Args:
+        weights (str): Path to the PyTorch .pt weights.
+        backend (str): "pytorch", "onnx", "openvino", "tflite" or "auto" (fastest benchmarked).
+        threads (int | None): Intra-op threads. None leaves the runtime default.
+        imgsz (int): Export input size.
+        warmup_shape (tuple): (height, width, channels) of the warm-up frame.
+    """
+    backend = resolve_backend(weights, backend)
+
+    path = export_model(weights, backend, imgsz)
+    model = YOLO(path, task="detect")
+
+    if threads:
+        import torch
+
+        # Pre/post-processing (and the PyTorch backend itself) run on torch.
+        torch.set_num_threads(threads)
+
+    # Warm-up inference; it also builds the predictor and runtime session, with the thread cap.
+    with _runtime_threads(backend, threads) if threads else contextlib.nullcontext():
+        model(np.zeros(warmup_shape, dtype=np.uint8), verbose=False)
+
+    print(f"[YOLO] Loaded {weights} with the {backend} backend.")
+    return model
+
+
+def benchmark_backends(
+    weights: str, backends: list = None, runs: int = 30, threads: int = None
+) -> dict:
+    """
+    Measures inference latency of each backend on this machine and stores the results
+    in models/backend_benchmark.json (used by backend="auto").
+
+    Returns:
+        dict: key: backend, value: latency statistics in milliseconds (or the error).
+    """
+    frame = np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    results = {}
+
+    for backend in backends or list(BACKENDS):
+        try:
+            model = load_model(weights, backend, threads=threads)
+            samples = []
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                model(frame, verbose=False)
+                samples.append((time.perf_counter() - t0) * 1000)
+            results[backend] = {
+                "p50_ms": round(float(np.percentile(samples, 50)), 2),
+                "p95_ms": round(float(np.percentile(samples, 95)), 2),
+                "mean_ms": round(float(np.mean(samples)), 2),
+            }
+        except Exception as e:
+            # A missing runtime (e.g. openvino not installed) should not abort the others.
+            results[backend] = {"error": str(e)}
+
+    all_results = _read_json(BENCHMARK_RESULTS)
+    all_results[weights] = results
+    _write_json(BENCHMARK_RESULTS, all_results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark YOLO inference backends on this machine."
+    )
+    parser.add_argument("--weights", default=os.path.join(MODELS_DIR, "yolo26n.pt"))
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS))
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--threads", type=int)
+    args = parser.parse_args()
+
+    results = benchmark_backends(args.weights, args.backends, args.runs, args.threads)
+
+    print(f"\n{'backend':>10} | {'p50 ms':>8} | {'p95 ms':>8} | {'mean ms':>8}")
+    for backend, r in results.items():
+        if "error" in r:
+            print(f"{backend:>10} | failed: {r['error']}")
+        else:
+            print(
+                f"{backend:>10} | {r['p50_ms']:>8.2f} | {r['p95_ms']:>8.2f} | {r['mean_ms']:>8.2f}"
+            )
+    print(f"\nFastest: {fastest_backend(args.weights)} (saved to {BENCHMARK_RESULTS})")
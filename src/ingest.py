@@ -0,0 +1,178 @@
+# File: src/ingest.py
+import threading
+import time
+from collections import OrderedDict, deque
+
+# -------------------------
+# Drop Policies
+# -------------------------
+# Discard the oldest queued frame of the camera that is over its share.
+DROP_OLDEST = "drop_oldest"
+# Only ever keep the single most recent frame per camera.
+KEEP_LATEST = "keep_latest"
+
+DROP_POLICIES = (DROP_OLDEST, KEEP_LATEST)
+
+
+class IngestQueue:
+    """
+    Bounded work queue sitting between the MQTT network thread and the detection workers.
+
+    Frames are held in one FIFO per camera and handed out round-robin, so a single
+    chatty camera cannot starve the others. When the queue is full, frames are dropped
+    according to the configured policy instead of blocking the MQTT thread.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 32,
+        max_per_camera: int = 4,
+        drop_policy: str = DROP_OLDEST,
+    ):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unknown drop policy '{drop_policy}'. Expected one of {DROP_POLICIES}."
+            )
+
+        self.max_size = max_size
+        self.max_per_camera = max_per_camera
+        self.drop_policy = drop_policy
+
+        # key: camera_id, value: deque of pending jobs. Order doubles as the round-robin cursor.
+        self._queues = OrderedDict()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Backpressure counters, exposed through stats().
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = {}  # key: camera_id, value: number of frames discarded
+
+    def _drop_from(self, camera_id: str, count: int = 1):
+        """Discards the oldest `count` jobs of one camera. Caller must hold the lock."""
+        pending = self._queues[camera_id]
+        for _ in range(min(count, len(pending))):
+            pending.popleft()
+            self._size -= 1
+            self.dropped[camera_id] = self.dropped.get(camera_id, 0) + 1
+
+    def put(self, camera_id: str, job) -> bool:
+        """
+        Enqueues a job without ever blocking the caller.
+
+        Returns:
+            bool: False if the queue has been closed, True otherwise (even if an older frame was dropped).
+        """
+        with self._cond:
+            if self._closed:
+                return False
+
+            pending = self._queues.setdefault(camera_id, deque())
+
+            if self.drop_policy == KEEP_LATEST:
+                # A newer frame supersedes everything still waiting for this camera.
+                self._drop_from(camera_id, len(pending))
+            elif len(pending) >= self.max_per_camera:
+                self._drop_from(camera_id)
+
+            if self._size >= self.max_size:
+                # Shed load from whichever camera currently holds the largest share.
+                busiest = max(self._queues, key=lambda cam: len(self._queues[cam]))
+                self._drop_from(busiest)
+
+            pending.append((time.perf_counter(), job))
+            self._size += 1
+            self.enqueued += 1
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: float = None):
+        """
+        Blocks until a job is available and returns it, visiting cameras round-robin.
+
+        Returns:
+            tuple | None: (queue_wait_seconds, job), or None once the queue is closed and drained
+            or the timeout expires.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size > 0 or self._closed, timeout):
+                return None
+            if self._size == 0:
+                return None
+
+            for camera_id, pending in self._queues.items():
+                if pending:
+                    enqueued_at, job = pending.popleft()
+                    # Send this camera to the back of the line for the next pick.
+                    self._queues.move_to_end(camera_id)
+                    self._size -= 1
+                    self.dequeued += 1
+                    return time.perf_counter() - enqueued_at, job
+
+        return None
+
+    def close(self):
+        """Stops accepting new jobs and wakes every waiting worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Returns a snapshot of queue depth and drop counters for monitoring."""
+        with self._cond:
+            return {
+                "depth": self._size,
+                "max_size": self.max_size,
+                "max_per_camera": self.max_per_camera,
+                "drop_policy": self.drop_policy,
+                "enqueued": self.enqueued,
+                "dequeued": self.dequeued,
+                "dropped_total": sum(self.dropped.values()),
+                "per_camera": {
+                    camera_id: {
+                        "depth": len(pending),
+                        "dropped": self.dropped.get(camera_id, 0),
+                    }
+                    for camera_id, pending in self._queues.items()
+                },
+            }
+
+
+class DetectionWorkerPool:
+    """Pool of daemon threads that drain an IngestQueue and run the detection handler."""
+
+    def __init__(self, work_queue: IngestQueue, handler, num_workers: int = 2):
+        self.work_queue = work_queue
+        self.handler = handler
+        self.num_workers = num_workers
+        self.threads = []
+
+    def start(self):
+        """Spawns the worker threads."""
+        for i in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._run, name=f"detection-worker-{i}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def _run(self):
+        while True:
+            item = self.work_queue.get()
+            if item is None:
+                break  # Queue closed and drained.
+
+            queue_wait, job = item
+            try:
+                self.handler(job, queue_wait)
+            except Exception as e:
+                # A single bad frame must never kill the worker.
+                print(f"[INGEST] Worker error while processing frame: {e}")
+
+    def stop(self, timeout: float = 5.0):
+        """Closes the queue, lets workers finish what is pending, then joins them."""
+        self.work_queue.close()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads.clear()
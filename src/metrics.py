@@ -0,0 +1,259 @@
+# File: src/metrics.py
+import abc
+import threading
+from bisect import bisect_left
+
+# Upper bounds (seconds) shared by every latency histogram: 1 ms .. 5 s.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    """
+    Base class: one child per label-value combination, created on first use and cached.
+
+    Recording takes a single uncontended lock on the child, so instrumentation can stay
+    enabled in production. Metrics may instead be backed by a function evaluated at
+    scrape time (see set_function), for values other components already track.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        self.function = None
+        (registry if registry is not None else REGISTRY).register(self)
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Returns the per-label-values child object that records the values."""
+
+    def labels(self, *values):
+        """Returns the child for the given label values (in `labelnames` order)."""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {values}"
+                )
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def set_function(self, function):
+        """
+        Reports the result of `function()` at scrape time instead of recorded values.
+        Unlabelled metrics return a number; labelled ones return {label_values_tuple: number}.
+        """
+        self.function = function
+
+    def _samples(self):
+        """Yields (suffix, label_values, extra_label, value) tuples for rendering."""
+        if self.function is not None:
+            result = self.function()
+            items = result.items() if self.labelnames else [((), result)]
+            for values, value in items:
+                yield "", values, "", value
+            return
+        with self.lock:
+            children = list(self.children.items())
+        for values, child in children:
+            yield from child.samples(values)
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, values, extra, value in self._samples():
+            labels = _format_labels(self.labelnames, values, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, values):
+        yield "", values, "", self.value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. frames processed."""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        """Shortcut for unlabelled counters."""
+        self.labels().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. queue depth."""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        """Shortcut for unlabelled gauges."""
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is the +Inf bucket.
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Index of the first bound >= value, i.e. the smallest "le" bucket holding it.
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, values):
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + (float("inf"),), counts):
+            cumulative += bucket
+            yield "_bucket", values, f'le="{_format_value(bound)}"', cumulative
+        yield "_sum", values, "", total
+        yield "_count", values, "", count
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets; percentiles are computed by the Prometheus server."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+        registry=None,
+    ):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, help_text, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        """Shortcut for unlabelled histograms."""
+        self.labels().observe(value)
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self.lock:
+            if any(existing.name == metric.name for existing in self.metrics):
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self.metrics.append(metric)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# -------------------------
+# Hub Metrics
+# -------------------------
+# Stages: queue_wait, decode, preprocess, batch_wait, yolo, face, file_io, db, end_to_end.
+STAGE_LATENCY = Histogram(
+    "hub_stage_latency_seconds",
+    "Latency of each hub pipeline stage per frame.",
+    ("stage", "camera_id"),
+)
+# Stages reported by the edge in the frame metadata: capture, preprocess, inference.
+EDGE_STAGE_LATENCY = Histogram(
+    "edge_stage_latency_seconds",
+    "Latency of each edge pipeline stage, as reported by the edge node.",
+    ("stage", "camera_id"),
+)
+MQTT_MESSAGES = Counter(
+    "hub_mqtt_messages_total",
+    "MQTT messages received, by result (accepted, duplicate, malformed, error).",
+    ("result",),
+)
+FRAMES = Counter(
+    "hub_frames_total",
+    "Frames leaving the detection stage, by outcome (validated, no_person, decode_error).",
+    ("camera_id", "outcome"),
+)
+BATCH_SIZE = Histogram(
+    "hub_yolo_batch_size",
+    "Number of frames per batched YOLO forward pass.",
+    buckets=(1, 2, 4, 8, 16, 32),
+)
+INGEST_DEPTH = Gauge(
+    "hub_ingest_queue_depth", "Frames waiting in the ingest queue.", ("camera_id",)
+)
+INGEST_DROPPED = Counter(
+    "hub_ingest_dropped_total",
+    "Frames dropped by the ingest queue under backpressure.",
+    ("camera_id",),
+)
+EVIDENCE_DEPTH = Gauge(
+    "hub_evidence_queue_depth", "Evidence items waiting for the writer thread."
+)
+EVIDENCE_DROPPED = Counter(
+    "hub_evidence_dropped_total", "Evidence items dropped because the writer queue was full."
+)
@@ -0,0 +1,134 @@
+# File: src/tracker.py
+import itertools
+import threading
+import time
+
+import numpy as np
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection over union of two sets of (x1, y1, x2, y2) boxes.
+
+    Returns:
+        np.ndarray: (len(boxes_a), len(boxes_b)) IoU values.
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)[:, None, :]
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class Track:
+    """A person followed across frames of one camera, with its last confirmed identity."""
+
+    def __init__(self, track_id: int, box):
+        self.track_id = track_id
+        self.box = box
+        self.identity = None  # Last face result for this person, or None if never verified.
+        self.frames_since_verify = 0
+        self.misses = 0
+        self.last_seen = time.monotonic()
+
+
+class IdentityTracker:
+    """
+    IoU tracker for the YOLO person boxes of a single camera.
+
+    A track keeps the identity recognised for it, so face encodings only have to be
+    recomputed for new tracks, for tracks without a face yet, or every `reverify_every`
+    frames to catch swaps.
+    """
+
+    _ids = itertools.count(1)  # Track ids are unique across all cameras.
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        reverify_every: int = 15,
+        max_misses: int = 5,
+        max_age: float = 10.0,
+    ):
+        self.iou_threshold = iou_threshold
+        self.reverify_every = reverify_every
+        self.max_misses = max_misses
+        self.max_age = max_age
+        self.tracks = []
+        self.lock = threading.Lock()
+
+    def update(self, person_boxes) -> list:
+        """
+        Associates this frame's person boxes with existing tracks (greedy by IoU).
+
+        Returns:
+            list[tuple]: (track, needs_verification) for each box, in input order.
+        """
+        now = time.monotonic()
+        boxes = np.asarray(person_boxes, dtype=np.float32).reshape(-1, 4)
+
+        with self.lock:
+            # Forget tracks that have not been seen for too long (camera idle, person left).
+            self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+
+            assigned = [None] * len(boxes)
+            if self.tracks and len(boxes):
+                ious = iou_matrix(boxes, np.array([t.box for t in self.tracks]))
+                # Highest overlaps first; each box and track is used at most once.
+                for flat in np.argsort(-ious, axis=None):
+                    b, t = np.unravel_index(flat, ious.shape)
+                    if ious[b, t] < self.iou_threshold:
+                        break
+                    track = self.tracks[t]
+                    if assigned[b] is None and all(track is not a for a in assigned):
+                        assigned[b] = track
+
+            matched = {id(track) for track in assigned if track is not None}
+            for track in self.tracks:
+                if id(track) not in matched:
+                    track.misses += 1
+            self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+            results = []
+            for box, track in zip(boxes, assigned):
+                if track is None:
+                    track = Track(next(self._ids), box)
+                    self.tracks.append(track)
+                else:
+                    track.box = box
+                    track.misses = 0
+                    track.frames_since_verify += 1
+                track.last_seen = now
+
+                needs_verification = (
+                    track.identity is None
+                    or track.frames_since_verify >= self.reverify_every
+                )
+                results.append((track, needs_verification))
+            return results
+
+    def confirm(self, track: Track, identity: dict):
+        """Stores a freshly recognised face for a track and resets its re-verification clock."""
+        with self.lock:
+            track.identity = identity
+            track.frames_since_verify = 0
+
+
+class TrackerRegistry:
+    """Lazily creates one IdentityTracker per camera_id."""
+
+    def __init__(self, **tracker_kwargs):
+        self.tracker_kwargs = tracker_kwargs
+        self.trackers = {}
+        self.lock = threading.Lock()
+
+    def get(self, camera_id: str) -> IdentityTracker:
+        with self.lock:
+            tracker = self.trackers.get(camera_id)
+            if tracker is None:
+                tracker = IdentityTracker(**self.tracker_kwargs)
+                self.trackers[camera_id] = tracker
+            return tracker
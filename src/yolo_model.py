@@ -3,63 +3,370 @@ from ultralytics import YOLO
 import os
 import cv2
 import numpy as np
+import threading
+import time
 from face_recogniser import FaceRecogniser
+from inference_backends import SINGLE_FRAME_BACKENDS, load_model, resolve_backend
+from tracker import TrackerRegistry
+
+# (width, height) every frame is letterboxed to before YOLO inference.
+INFERENCE_SIZE = (640, 360)
+# Border colour of the letterbox padding (the grey ultralytics pads with).
+LETTERBOX_COLOUR = (114, 114, 114)
+
+# Face search area inside a person box: the top FACE_REGION_RATIO of its height,
+# widened by FACE_REGION_PADDING of its width (and height above) on each side.
+FACE_REGION_RATIO = 0.5
+FACE_REGION_PADDING = 0.1
+
+# A tracked person's identity is re-checked against the gallery every N frames.
+REVERIFY_EVERY_N_FRAMES = 15
+
+# Detection cascade: best person confidences in [low, high) are re-checked by the larger model.
+CASCADE_BAND = (0.25, 0.6)
 
 
 class Detector:
-    def __init__(self):
+    def __init__(
+        self,
+        weights: str = "models/yolo26n.pt",
+        backend: str = "pytorch",
+        threads: int = None,
+        cascade_weights: str = None,
+        cascade_band: tuple = CASCADE_BAND,
+    ):
+        """
+        Args:
+            weights (str): PyTorch weights. For higher accuracy use "models/yolo26m.pt".
+            backend (str): "pytorch", "onnx", "openvino", "tflite" (int8) or "auto".
+                Non-PyTorch backends are exported once and cached under models/.
+            threads (int | None): Intra-op inference threads; None keeps the runtime default.
+            cascade_weights (str | None): Larger second-stage model (e.g. "models/yolo26m.pt").
+                When set, only frames whose best person confidence falls inside
+                `cascade_band` are re-run through it. It is loaded on first use.
+            cascade_band (tuple): (low, high) person confidence range considered ambiguous.
+        """
         os.makedirs("models", exist_ok=True)
-        # Load a YOLO26m PyTorch model
-        # For the lower end used "yolo26n.pt"
-        # self.model = YOLO("models/yolo26m.pt")
-        self.model = YOLO("models/yolo26n.pt")
+        self.backend = resolve_backend(weights, backend)
+        self.threads = threads
+
+        # Load the YOLO model through the selected backend, warmed up and ready.
+        self.model = load_model(weights, backend=self.backend, threads=threads)
+        # The ultralytics predictor is not thread-safe, so detection workers take turns on it.
+        self.model_lock = threading.Lock()
+
+        # Optional second stage of the detection cascade, lazily loaded.
+        self.cascade_weights = cascade_weights
+        self.cascade_band = cascade_band
+        self.cascade_model = None
+        self.cascade_lock = threading.Lock()
+        # Updated by every detection worker; all reads and writes hold stats_lock.
+        self.stats_lock = threading.Lock()
+        self.cascade_stats = {
+            "frames": 0,
+            "escalated": 0,
+            "stage1_ms": 0.0,
+            "stage2_ms": 0.0,
+        }
 
         # Initialise face recogniser
         self.face_recogniser = FaceRecogniser()
 
+        # One IoU tracker per camera so confirmed identities are not re-encoded every frame.
+        self.trackers = TrackerRegistry(reverify_every=REVERIFY_EVERY_N_FRAMES)
+
     def get_model(self) -> YOLO:
         return self.model
 
-    def detect_frame(self, frame: np.ndarray, annotate: bool = True):
+    @staticmethod
+    def letterbox_geometry(frame: np.ndarray) -> tuple:
         """
-        Run YOLO detection on a single camera frame matrix.
+        Where a frame lands inside the INFERENCE_SIZE letterbox.
 
-        Args:
-            frame (np.ndarray): OpenCV image matrix.
-            annotate (bool): Whether to return an annotated frame with bounding boxes.
+        Returns:
+            tuple: (scale, pad_x, pad_y). Inference coordinates are frame coordinates
+                   times `scale` plus the padding offsets.
+        """
+        height, width = frame.shape[:2]
+        scale = min(INFERENCE_SIZE[0] / width, INFERENCE_SIZE[1] / height)
+        pad_x = (INFERENCE_SIZE[0] - round(width * scale)) // 2
+        pad_y = (INFERENCE_SIZE[1] - round(height * scale)) // 2
+        return scale, pad_x, pad_y
+
+    def preprocess(self, frame: np.ndarray):
+        """
+        Validate and downscale a camera frame for inference.
+
+        The frame is scaled to fit INFERENCE_SIZE and padded, never stretched, so person
+        crops from the edge (any aspect ratio) keep their proportions. 16:9 camera frames
+        fill it exactly.
 
         Returns:
-            results (ultralytics.engine.results.Results): YOLO detection results object.
-            annotated_frame (np.ndarray | None): OpenCV frame with bounding boxes (if annotate=True).
-            face_results (list): List of recognised faces and coordinates.
+            np.ndarray | None: The 640x360 frame, or None if the matrix is invalid.
         """
         # Validate the incoming matrix
         if frame is None or not isinstance(frame, np.ndarray):
             print("[YOLO] Error: Invalid frame matrix passed to detector.")
-            return None, None, None
+            return None
 
         # Resize to smaller resolution for faster inference.
-        frame_small = cv2.resize(frame, (640, 360))
+        scale, pad_x, pad_y = self.letterbox_geometry(frame)
+        height, width = frame.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        small = cv2.resize(frame, size)
+        return cv2.copyMakeBorder(
+            small,
+            pad_y,
+            INFERENCE_SIZE[1] - size[1] - pad_y,
+            pad_x,
+            INFERENCE_SIZE[0] - size[0] - pad_x,
+            cv2.BORDER_CONSTANT,
+            value=LETTERBOX_COLOUR,
+        )
+
+    def _run_model(self, model: YOLO, frames_small: list, **kwargs) -> list:
+        """Runs a list of frames, one call per frame for exports with a fixed batch of one."""
+        if self.backend in SINGLE_FRAME_BACKENDS:
+            return [model(frame, **kwargs)[0] for frame in frames_small]
+        return model(frames_small, **kwargs)
 
-        # Run YOLO detection
-        yolo_results = self.model(frame_small)  # Returns list of Results objects.
+    def predict_batch(self, frames_small: list) -> list:
+        """
+        Run YOLO once over a list of preprocessed frames.
+
+        Returns:
+            list: One ultralytics Results object per input frame, in order.
+        """
+        if not frames_small:
+            return []
+
+        t0 = time.perf_counter()
+        with self.model_lock:
+            if self.cascade_weights:
+                # Keep weaker boxes so the whole uncertainty band is visible to the cascade.
+                results = self._run_model(
+                    self.model, frames_small, conf=min(0.25, self.cascade_band[0])
+                )
+            else:
+                results = self._run_model(self.model, frames_small)  # One Results per frame.
+        t1 = time.perf_counter()
+
+        with self.stats_lock:
+            self.cascade_stats["frames"] += len(frames_small)
+            self.cascade_stats["stage1_ms"] += (t1 - t0) * 1000
+
+        if self.cascade_weights:
+            results = self._escalate_ambiguous(frames_small, results)
+        return results
+
+    @staticmethod
+    def best_person_confidence(yolo_result) -> float:
+        """Highest confidence among 'person' (class 0) boxes, or 0.0 if there are none."""
+        classes = yolo_result.boxes.cls.cpu().numpy().astype(int)
+        confidences = yolo_result.boxes.conf.cpu().numpy()[classes == 0]
+        return float(confidences.max()) if len(confidences) else 0.0
+
+    def _escalate_ambiguous(self, frames_small: list, results: list) -> list:
+        """
+        Second cascade stage: re-run the larger model on frames whose best person
+        confidence is inside the uncertainty band, and substitute its results.
+        """
+        low, high = self.cascade_band
+        ambiguous = [
+            i
+            for i, result in enumerate(results)
+            if low <= self.best_person_confidence(result) < high
+        ]
+        if not ambiguous:
+            return results
+
+        t0 = time.perf_counter()
+        with self.cascade_lock:
+            if self.cascade_model is None:
+                print(f"[YOLO] Loading cascade model {self.cascade_weights}...")
+                self.cascade_model = load_model(
+                    self.cascade_weights, backend=self.backend, threads=self.threads
+                )
+            refined = self._run_model(self.cascade_model, [frames_small[i] for i in ambiguous])
+        t1 = time.perf_counter()
+
+        with self.stats_lock:
+            self.cascade_stats["escalated"] += len(ambiguous)
+            self.cascade_stats["stage2_ms"] += (t1 - t0) * 1000
+
+        results = list(results)
+        for i, result in zip(ambiguous, refined):
+            results[i] = result
+        return results
+
+    def get_cascade_stats(self) -> dict:
+        """Per-stage hit rates and mean latencies of the detection cascade."""
+        with self.stats_lock:
+            stats = dict(self.cascade_stats)
+        frames = stats["frames"]
+        escalated = stats["escalated"]
+        return {
+            "enabled": bool(self.cascade_weights),
+            "band": list(self.cascade_band),
+            "frames": frames,
+            "escalated": escalated,
+            "stage1_only_rate": round(1 - escalated / frames, 3) if frames else 0.0,
+            "escalation_rate": round(escalated / frames, 3) if frames else 0.0,
+            "stage1_mean_ms": round(stats["stage1_ms"] / frames, 2) if frames else 0.0,
+            "stage2_mean_ms": round(stats["stage2_ms"] / escalated, 2) if escalated else 0.0,
+        }
+
+    def person_face_regions(self, frame: np.ndarray, person_boxes: np.ndarray) -> list:
+        """
+        Map YOLO person boxes (inference coordinates) to the head-and-shoulders area
+        of each person in the full-resolution frame.
+
+        Returns:
+            list: (left, top, right, bottom) integer boxes in `frame` coordinates.
+        """
+        height, width = frame.shape[:2]
+        scale, pad_x, pad_y = self.letterbox_geometry(frame)
+
+        regions = []
+        for x1, y1, x2, y2 in person_boxes:
+            pad = (x2 - x1) * FACE_REGION_PADDING
+            top = y1 - (y2 - y1) * FACE_REGION_PADDING
+            bottom = y1 + (y2 - y1) * FACE_REGION_RATIO
+            regions.append(
+                (
+                    max(0, int((x1 - pad - pad_x) / scale)),
+                    max(0, int((top - pad_y) / scale)),
+                    min(width, int((x2 + pad - pad_x) / scale)),
+                    min(height, int((bottom - pad_y) / scale)),
+                )
+            )
+        return regions
 
+    def _recognise_tracked(
+        self, camera_id: str, frame: np.ndarray, person_boxes: np.ndarray, regions: list
+    ) -> list:
+        """
+        Recognise faces only for tracks that are new or due for re-verification,
+        and reuse the confirmed identity of every other track.
+
+        Returns:
+            list: Face result dicts (frame coordinates), each carrying a `track_id`.
+        """
+        tracker = self.trackers.get(camera_id)
+        tracked = tracker.update(person_boxes)
+
+        verify = [i for i, (_, needs_verification) in enumerate(tracked) if needs_verification]
+        fresh = []
+        if verify:
+            fresh = self.face_recogniser.recognise(
+                frame, regions=[regions[i] for i in verify]
+            )
+
+        face_results = []
+        for i, (track, needs_verification) in enumerate(tracked):
+            left, top, right, bottom = regions[i]
+            width = max(right - left, 1)
+            height = max(bottom - top, 1)
+
+            if needs_verification:
+                # Claim the first face whose centre falls inside this person's region.
+                face = None
+                for candidate in fresh:
+                    f_left, f_top, f_right, f_bottom = candidate["box"]
+                    cx, cy = (f_left + f_right) / 2, (f_top + f_bottom) / 2
+                    if left <= cx <= right and top <= cy <= bottom:
+                        face = candidate
+                        fresh.remove(candidate)
+                        break
+
+                if face is None:
+                    # No face visible (e.g. back turned): keep any previous identity.
+                    if track.identity is not None:
+                        tracker.confirm(track, track.identity)
+                    else:
+                        continue
+                else:
+                    f_left, f_top, f_right, f_bottom = face["box"]
+                    identity = dict(face)
+                    # Remember the face position relative to the person region.
+                    identity["relative_box"] = (
+                        (f_left - left) / width,
+                        (f_top - top) / height,
+                        (f_right - left) / width,
+                        (f_bottom - top) / height,
+                    )
+                    tracker.confirm(track, identity)
+
+            identity = track.identity
+            r_left, r_top, r_right, r_bottom = identity["relative_box"]
+            face_results.append(
+                {
+                    "name": identity["name"],
+                    "confidence": identity["confidence"],
+                    "box": (
+                        left + int(r_left * width),
+                        top + int(r_top * height),
+                        left + int(r_right * width),
+                        top + int(r_bottom * height),
+                    ),
+                    "candidates": identity["candidates"],
+                    "track_id": track.track_id,
+                    "verified": needs_verification,
+                }
+            )
+
+        return face_results
+
+    def postprocess(
+        self,
+        frame: np.ndarray,
+        frame_small: np.ndarray,
+        yolo_result,
+        annotate: bool = True,
+        camera_id: str = None,
+    ):
+        """
+        Gate on the YOLO person class, run face recognition and annotate one frame.
+
+        Args:
+            frame (np.ndarray): Original full-resolution frame, used for face crops.
+            frame_small (np.ndarray): The downscaled frame YOLO ran on.
+            camera_id (str | None): Source camera. When given, people are tracked across
+                frames and known identities are reused instead of re-encoding every face.
+
+        Returns:
+            tuple: (results, annotated_frame, face_results), as documented on detect_frame.
+        """
         # Annotate frame if requested.
-        annotated_frame = yolo_results[0].plot() if annotate else frame_small.copy()
+        annotated_frame = yolo_result.plot() if annotate else frame_small.copy()
 
-        person_detected = False
         face_results = []
 
-        # Parse YOLO results to verify if a 'person' (class 0) is in the frame.
-        for box in yolo_results[0].boxes:
-            if int(box.cls[0]) == 0:
-                person_detected = True
-                break
+        # Parse YOLO results to keep only 'person' (class 0) boxes.
+        classes = yolo_result.boxes.cls.cpu().numpy().astype(int)
+        person_boxes = yolo_result.boxes.xyxy.cpu().numpy()[classes == 0]
 
         # Only trigger facial recognition if a human is present.
-        if person_detected:
-            # Run face recognition on the same frame.
-            face_results = self.face_recogniser.recognise(frame_small)
+        if len(person_boxes):
+            # Scan only the upper part of each person, cropped from the sharp original frame.
+            regions = self.person_face_regions(frame, person_boxes)
+            if camera_id is None:
+                face_results = self.face_recogniser.recognise(frame, regions=regions)
+            else:
+                face_results = self._recognise_tracked(
+                    camera_id, frame, person_boxes, regions
+                )
+
+            # Bring face boxes back to the inference resolution used for annotation.
+            scale, pad_x, pad_y = self.letterbox_geometry(frame)
+            for face in face_results:
+                left, top, right, bottom = face["box"]
+                face["box"] = (
+                    int(left * scale) + pad_x,
+                    int(top * scale) + pad_y,
+                    int(right * scale) + pad_x,
+                    int(bottom * scale) + pad_y,
+                )
 
             # Draw custom face boxes and labels over the YOLO annotations.
             for face in face_results:
@@ -84,6 +391,58 @@ class Detector:
 
         else:
             # Return a specific flag if YOLO did not see a person, so app.py known to ignore it.
-            return yolo_results[0], annotated_frame, "NO_PERSON"
+            return yolo_result, annotated_frame, "NO_PERSON"
 
-        return yolo_results[0], annotated_frame, face_results
+        return yolo_result, annotated_frame, face_results
+
+    def detect_frame(
+        self, frame: np.ndarray, annotate: bool = True, camera_id: str = None
+    ):
+        """
+        Run YOLO detection on a single camera frame matrix.
+
+        Args:
+            frame (np.ndarray): OpenCV image matrix.
+            annotate (bool): Whether to return an annotated frame with bounding boxes.
+            camera_id (str | None): Source camera, enables per-camera identity tracking.
+
+        Returns:
+            results (ultralytics.engine.results.Results): YOLO detection results object.
+            annotated_frame (np.ndarray | None): OpenCV frame with bounding boxes (if annotate=True).
+            face_results (list): List of recognised faces and coordinates.
+        """
+        return self.detect_batch([frame], annotate=annotate, camera_ids=[camera_id])[0]
+
+    def detect_batch(
+        self, frames: list, annotate: bool = True, camera_ids: list = None
+    ) -> list:
+        """
+        Run YOLO detection on several camera frames in a single forward pass.
+
+        Args:
+            frames (list[np.ndarray]): OpenCV image matrices, e.g. one per edge camera.
+            annotate (bool): Whether to return annotated frames with bounding boxes.
+            camera_ids (list[str] | None): Source camera of each frame, enables identity tracking.
+
+        Returns:
+            list: One (results, annotated_frame, face_results) tuple per input frame, in order.
+                  Invalid frames yield (None, None, None).
+        """
+        frames_small = [self.preprocess(frame) for frame in frames]
+        valid = [small for small in frames_small if small is not None]
+        yolo_results = iter(self.predict_batch(valid))
+
+        outputs = []
+        if camera_ids is None:
+            camera_ids = [None] * len(frames)
+
+        for frame, small, camera_id in zip(frames, frames_small, camera_ids):
+            if small is None:
+                outputs.append((None, None, None))
+            else:
+                outputs.append(
+                    self.postprocess(
+                        frame, small, next(yolo_results), annotate, camera_id
+                    )
+                )
+        return outputs